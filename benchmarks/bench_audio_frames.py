@@ -0,0 +1,103 @@
+"""
+Per-frame CPU cost of the audio capture loop: the original path (a fresh
+`struct.unpack_from("h" * n)` tuple per frame, frames collected in a list and
+joined at the end) against the preallocated PCMRing with memoryview frames and
+a sliced segment, whose frames reach the detectors through native_process().
+
+No microphone is needed; frames are synthetic. The detector stand-in has the
+Porcupine and Cobra wrappers' shape: `process()` rebuilds the frame as a C array
+element by element before the native call. With `--marshal` that copy is
+counted, which is where the original loop spends most of its time; the native
+call itself (the hotword and VAD models) is not modelled and costs both paths
+the same.
+
+    python -m benchmarks.bench_audio_frames [--frames 5000] [--frame-length 512] [--marshal]
+"""
+import argparse
+import ctypes
+import struct
+import time
+from enum import Enum
+import numpy as np
+from core.pcm_ring import PCMRing, native_process
+
+
+def make_frames(count: int, frame_length: int) -> list[bytes]:
+    rng = np.random.default_rng(0)
+    return [rng.integers(-3000, 3000, frame_length, dtype=np.int16).tobytes() for _ in range(8)] * (count // 8)
+
+class StandInDetector:
+    """Shaped like pvporcupine.Porcupine: a wrapper around a ctypes `_process_func`."""
+
+    class PicovoiceStatuses(Enum):
+        SUCCESS = 0
+
+    def __init__(self, frame_length: int, marshal: bool):
+        self.frame_length = frame_length
+        self.marshal = marshal
+        self._handle = None
+
+        def native(handle, pcm, result):
+            return self.PicovoiceStatuses.SUCCESS
+        native.argtypes = [None, ctypes.POINTER(ctypes.c_short), ctypes.POINTER(ctypes.c_int)]
+        self._process_func = native
+
+    def process(self, pcm) -> int:
+        result = ctypes.c_int(-1)
+        frame = (ctypes.c_short * len(pcm))(*pcm) if self.marshal else None
+        self._process_func(self._handle, frame, ctypes.byref(result))
+        return result.value
+
+def run_unpack(frames, frame_length, detector):
+    """The original loop: unpack per frame, hotword + VAD call, list append, join."""
+    recorded = []
+    for pcm_bytes in frames:
+        pcm = struct.unpack_from("h" * frame_length, pcm_bytes)
+        detector.process(pcm)
+        detector.process(pcm)
+        recorded.append(pcm_bytes)
+    return b"".join(recorded)
+
+def run_ring(frames, frame_length, detector):
+    """The new loop: copy into the ring, hand its memory to both native calls, one slice at the end."""
+    ring = PCMRing(len(frames), frame_length)
+    process = native_process(detector)
+    for pcm_bytes in frames:
+        frame = ring.write(pcm_bytes)
+        process(frame)
+        process(frame)
+    return ring.window(0).copy()
+
+def measure(run, frames, frame_length, detector, repeat: int = 3) -> float:
+    """Best-of-`repeat` CPU microseconds per frame."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        run(frames, frame_length, detector)
+        best = min(best, time.process_time() - start)
+    return best * 1e6 / len(frames)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=5000)
+    parser.add_argument("--frame-length", type=int, default=512)
+    parser.add_argument("--marshal", action="store_true",
+                        help="Include the detectors' conversion of each frame to a C array.")
+    args = parser.parse_args()
+
+    frames = make_frames(args.frames, args.frame_length)
+    detector = StandInDetector(args.frame_length, args.marshal)
+    assert run_unpack(frames, args.frame_length, detector) == run_ring(frames, args.frame_length, detector).tobytes()
+
+    frame_ms = args.frame_length / 16000 * 1000
+    before = measure(run_unpack, frames, args.frame_length, detector)
+    after = measure(run_ring, frames, args.frame_length, detector)
+    print(f"\n🎙️ {len(frames)} frames of {args.frame_length} samples ({frame_ms:.0f} ms each)"
+          f"{', detector marshalling included' if args.marshal else ''}")
+    print(f"   {'path':<26}{'µs/frame':>10}{'% of a core':>13}")
+    print(f"   {'struct.unpack + join':<26}{before:>10.1f}{before / (frame_ms * 10):>12.2f}%")
+    print(f"   {'PCMRing + native_process':<26}{after:>10.1f}{after / (frame_ms * 10):>12.2f}%")
+    print(f"   speed-up {before / after:.1f}x")
+
+if __name__ == "__main__":
+    main()
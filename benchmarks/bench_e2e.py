@@ -0,0 +1,327 @@
+"""
+End-to-end load test of server.py with no phone and no cloud keys.
+
+Starts three local stand-ins (benchmarks/standins):
+- fake_llm: a scripted, OpenAI/Groq-compatible chat server;
+- adb_shim: a simulated device;
+- stub_stt: an STT backend.
+It then starts the server against them in a scratch working directory, so the
+real Data/ files and .env are never touched. The scratch .env loads the stub
+STT backend and turns the screen answer cache off, so every request exercises
+the vision path. Add or override
+server settings with --env. Each scenario is driven at each concurrency
+level. The report shows p50/p95/p99 latency, throughput and the mean time per
+pipeline stage (read from /metrics).
+
+Results are saved as JSON. Pass an earlier file with --compare to flag
+regressions; the exit status is 1 when any are found.
+
+    python -m benchmarks.bench_e2e [--clients 1 4 16] [--requests 40] [--scenarios chat one_tool ...]
+        [--llm-latency-ms 250] [--stt-latency-ms 100] [--adb-latency-ms 15] [--env BlockingWorkers=16 ...]
+        [--output benchmarks/results/e2e.json] [--compare benchmarks/results/baseline.json]
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+import httpx
+from benchmarks.standins import adb_shim
+from benchmarks.standins.stub_stt import make_wav
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_DIR, "benchmarks", "results")
+# Written to the scratch .env with StubSTTLatencyMs; --env entries are added after these.
+SERVER_ENV = {"STTBackend": "benchmarks.standins.stub_stt:StubSTTBackend", "VisionCacheTTL": "0"}
+_STAGE_LINE = re.compile(r'^jarvis_stage_seconds_(sum|count)\{stage="([^"]+)"\} (\S+)$', re.MULTILINE)
+
+
+@dataclass
+class Scenario:
+    name: str
+    endpoint: str
+    text: str                                   # What the stub STT "hears"
+    steps: list = field(default_factory=list)   # The fake LLM's script for this text
+
+def _tool(name: str, **arguments) -> dict:
+    return {"name": name, "arguments": arguments}
+
+SCENARIOS = [
+    # Answered by the intent router; no LLM round.
+    Scenario("fast_path", "/api/jarvis", "open youtube"),
+    Scenario("chat", "/api/jarvis", "tell me something interesting", [
+        {"content": "Octopuses have three hearts and blue blood, sir. Two of the hearts stop while they swim."}]),
+    Scenario("one_tool", "/api/jarvis", "how is my phone holding up", [
+        {"tool_calls": [_tool("battery_stats")]},
+        {"content": "Your battery is at 80 percent and charging over USB, sir."}]),
+    Scenario("parallel_tools", "/api/jarvis", "get my phone ready for the night", [
+        {"tool_calls": [_tool("get_brightness"), _tool("set_brightness", level=20), _tool("battery_stats")]},
+        {"content": "Brightness is down to 20 and the battery is at 80 percent. Good night, sir."}]),
+    Scenario("screen", "/api/jarvis", "what am i looking at", [
+        {"tool_calls": [_tool("analyze_screen", question="What is on the screen?")]},
+        {"content": "You're on your home screen, sir."}]),
+    Scenario("stream_one_tool", "/api/jarvis/stream", "how is my phone holding up"),
+]
+
+
+# --- Stand-ins ---
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _ignore_local_state(directory, names):
+    # Databases, recordings and STT models stay behind; the server starts from clean state.
+    return [n for n in names if n.endswith((".db", ".db-wal", ".db-shm", ".wav", ".mp3")) or n.startswith("vosk-model")]
+
+
+class Stack:
+    """The fake LLM, adb shim, stub STT and the server under test, in a scratch directory."""
+
+    def __init__(self, args):
+        self.args = args
+        self.workdir = tempfile.mkdtemp(prefix="jarvis-bench-")
+        self.llm_port = _free_port()
+        self.port = _free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self._processes = []
+
+    def _spawn(self, name: str, command: list[str], cwd: str, env: dict) -> subprocess.Popen:
+        log = open(os.path.join(self.workdir, f"{name}.log"), "w")
+        process = subprocess.Popen(command, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+        self._processes.append((process, log))
+        return process
+
+    def _wait_ready(self, url: str, name: str, timeout: float = 60):
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            try:
+                if httpx.get(url, timeout=1).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError(f"{name} did not start; see {os.path.join(self.workdir, name + '.log')}")
+
+    def start(self, scenarios: list[Scenario]):
+        for folder in ("Data", "config"):
+            shutil.copytree(os.path.join(REPO_DIR, folder), os.path.join(self.workdir, folder),
+                            ignore=_ignore_local_state, dirs_exist_ok=True)
+        adb_dir = adb_shim.install(os.path.join(self.workdir, "adb"), self.args.adb_latency_ms)
+        with open(os.path.join(self.workdir, ".env"), "w") as f:
+            settings = {**SERVER_ENV, "StubSTTLatencyMs": str(self.args.stt_latency_ms),
+                        **dict(e.split("=", 1) for e in self.args.env)}
+            for key, value in settings.items():
+                f.write(f"{key}={value}\n")
+        script_path = os.path.join(self.workdir, "llm_script.json")
+        with open(script_path, "w") as f:
+            json.dump({s.text: s.steps for s in scenarios if s.steps}, f, indent=2)
+
+        env = dict(os.environ)
+        env["PYTHONPATH"] = REPO_DIR + os.pathsep + env.get("PYTHONPATH", "")
+        self._spawn("fake_llm", [sys.executable, "-m", "benchmarks.standins.fake_llm", "--script", script_path,
+                                 "--port", str(self.llm_port), "--latency-ms", str(self.args.llm_latency_ms),
+                                 "--tokens-per-second", str(self.args.llm_tokens_per_second)], REPO_DIR, env)
+        self._wait_ready(f"http://127.0.0.1:{self.llm_port}/stats", "fake_llm")
+
+        env.update({
+            "PATH": adb_dir + os.pathsep + env.get("PATH", ""),
+            "GROQ_BASE_URL": f"http://127.0.0.1:{self.llm_port}",
+            "GROQ_API_KEY": "benchmark",
+        })
+        self._spawn("server", [sys.executable, "-m", "uvicorn", "server:app", "--port", str(self.port),
+                               "--log-level", "warning"], self.workdir, env)
+        self._wait_ready(f"{self.base_url}/metrics", "server")
+
+    def stop(self):
+        for process, log in reversed(self._processes):
+            process.terminate()
+            try:
+                process.wait(10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+            log.close()
+        if self.args.keep:
+            print(f"📁 Logs and scratch files kept in {self.workdir}")
+        else:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+# --- Load ---
+def percentile(values: list[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return float("nan")
+    return values[min(len(values) - 1, max(0, math.ceil(p / 100 * len(values)) - 1))]
+
+def _stage_totals(metrics: str) -> dict:
+    totals = {}
+    for kind, stage, value in _STAGE_LINE.findall(metrics):
+        totals.setdefault(stage, {"sum": 0.0, "count": 0})[kind] = float(value)
+    return totals
+
+async def _one_request(client: httpx.AsyncClient, url: str, audio: bytes, stream: bool) -> tuple[float, float | None]:
+    """Returns (latency, time to first byte for streams); raises on a failed request."""
+    files = {"audio": ("command.wav", audio, "audio/wav")}
+    start = time.perf_counter()
+    if not stream:
+        response = await client.post(url, files=files)
+        response.raise_for_status()
+        if "response" not in response.json():
+            raise ValueError("No response field in the reply.")
+        return time.perf_counter() - start, None
+    first_byte, body = None, b""
+    async with client.stream("POST", url, files=files) as response:
+        response.raise_for_status()
+        async for chunk in response.aiter_bytes():
+            first_byte = first_byte or time.perf_counter() - start
+            body += chunk
+    if b"event: final" not in body:
+        raise ValueError("The stream ended without a final event.")
+    return time.perf_counter() - start, first_byte
+
+async def run_level(base_url: str, scenario: Scenario, clients: int, requests: int, audio: bytes) -> dict:
+    url = base_url + scenario.endpoint
+    stream = scenario.endpoint.endswith("/stream")
+    latencies, first_bytes, errors = [], [], []
+    remaining = iter(range(requests))  # Shared by the workers, so exactly `requests` are sent
+
+    async with httpx.AsyncClient(timeout=120, limits=httpx.Limits(max_connections=clients)) as client:
+        await _one_request(client, url, audio, stream)  # Warm-up: lazy imports, app sync, connections
+        before = _stage_totals((await client.get(base_url + "/metrics")).text)
+
+        async def worker():
+            for _ in remaining:
+                try:
+                    latency, first_byte = await _one_request(client, url, audio, stream)
+                    latencies.append(latency)
+                    if first_byte is not None:
+                        first_bytes.append(first_byte)
+                except (httpx.HTTPError, ValueError) as e:
+                    errors.append(str(e))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+        after = _stage_totals((await client.get(base_url + "/metrics")).text)
+
+    stages = {}
+    for stage, total in after.items():
+        count = total["count"] - before.get(stage, {}).get("count", 0)
+        if count and stage != "request":
+            stages[stage] = {"mean_ms": round((total["sum"] - before.get(stage, {}).get("sum", 0)) / count * 1000, 1),
+                             "per_request": round(count / max(len(latencies), 1), 2)}
+    latencies.sort()
+    first_bytes.sort()
+    ms = lambda seconds: round(seconds * 1000, 1)
+    return {
+        "scenario": scenario.name, "endpoint": scenario.endpoint, "clients": clients,
+        "requests": len(latencies), "errors": len(errors), "error_samples": errors[:3],
+        "throughput": round(len(latencies) / elapsed, 2),
+        "p50_ms": ms(percentile(latencies, 50)), "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "first_byte_p50_ms": ms(percentile(first_bytes, 50)) if first_bytes else None,
+        "stages": stages,
+    }
+
+
+# --- Report ---
+def print_result(result: dict):
+    first_byte = f"{result['first_byte_p50_ms']:>9.0f}" if result["first_byte_p50_ms"] is not None else f"{'-':>9}"
+    print(f"{result['scenario']:<18}{result['clients']:>8}{result['requests']:>6}{result['errors']:>6}"
+          f"{result['throughput']:>9.2f}{result['p50_ms']:>9.0f}{result['p95_ms']:>9.0f}{result['p99_ms']:>9.0f}{first_byte}")
+    if result["stages"]:
+        stages = ", ".join(f"{name} {s['mean_ms']:.0f} ms x{s['per_request']:g}"
+                           for name, s in sorted(result["stages"].items()))
+        print(f"{'':<18}   stages: {stages}")
+    for sample in result["error_samples"]:
+        print(f"{'':<18}   ❌ {sample}")
+
+def compare(results: list[dict], baseline_path: str, tolerance: float) -> int:
+    """Prints the change against a saved run; returns the number of regressions."""
+    with open(baseline_path, "r") as f:
+        baseline = {(r["scenario"], r["clients"]): r for r in json.load(f)["results"]}
+    regressions = 0
+    print(f"\n📊 Against {baseline_path} (tolerance {tolerance:.0%}):")
+    for result in results:
+        old = baseline.get((result["scenario"], result["clients"]))
+        if old is None:
+            continue
+        p95 = result["p95_ms"] / old["p95_ms"] - 1 if old["p95_ms"] else 0.0
+        throughput = result["throughput"] / old["throughput"] - 1 if old["throughput"] else 0.0
+        regressed = p95 > tolerance or throughput < -tolerance or result["errors"] > old["errors"]
+        regressions += regressed
+        print(f"   {'⚠️ ' if regressed else '✅'} {result['scenario']:<18}{result['clients']:>4} clients   "
+              f"p95 {old['p95_ms']:.0f} -> {result['p95_ms']:.0f} ms ({p95:+.0%})   "
+              f"req/s {old['throughput']:.2f} -> {result['throughput']:.2f} ({throughput:+.0%})")
+    return regressions
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=[s.name for s in SCENARIOS],
+                        default=[s.name for s in SCENARIOS])
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16], help="Concurrency levels.")
+    parser.add_argument("--requests", type=int, default=40, help="Requests per scenario and level.")
+    parser.add_argument("--llm-latency-ms", type=float, default=250, help="Fake LLM time to first token.")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=400)
+    parser.add_argument("--stt-latency-ms", type=float, default=100)
+    parser.add_argument("--adb-latency-ms", type=float, default=15, help="Simulated time per device command.")
+    parser.add_argument("--env", nargs="*", default=[], metavar="KEY=VALUE",
+                        help="Extra settings for the server's .env, e.g. BlockingWorkers=16.")
+    parser.add_argument("--audio-seconds", type=float, default=2.0, help="Length of the uploaded WAV.")
+    parser.add_argument("--output", help="Where to save the results (default: benchmarks/results/e2e-<time>.json).")
+    parser.add_argument("--compare", help="A saved results file to check for regressions.")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed p95/throughput change.")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch directory and logs.")
+    args = parser.parse_args()
+
+    scenarios = [s for s in SCENARIOS if s.name in args.scenarios]
+    # Scenarios that share an utterance share its script.
+    scripts = {s.text: s.steps for s in SCENARIOS if s.steps}
+    for s in scenarios:
+        s.steps = s.steps or scripts.get(s.text, [])
+
+    stack = Stack(args)
+    print(f"🚀 Starting the stand-ins and the server in {stack.workdir} ...")
+    results = []
+    try:
+        stack.start(scenarios)
+        print(f"\n{'scenario':<18}{'clients':>8}{'reqs':>6}{'errs':>6}{'req/s':>9}"
+              f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'TTFB ms':>9}")
+        for scenario in scenarios:
+            audio = make_wav(scenario.text, args.audio_seconds)
+            for clients in args.clients:
+                result = asyncio.run(run_level(stack.base_url, scenario, clients, args.requests, audio))
+                results.append(result)
+                print_result(result)
+    finally:
+        stack.stop()
+
+    output = args.output or os.path.join(RESULTS_DIR, f"e2e-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    settings = {k: v for k, v in vars(args).items() if k not in ("output", "compare", "keep")}
+    with open(output, "w") as f:
+        json.dump({"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": _git_commit(),
+                   "settings": settings, "results": results}, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
+
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
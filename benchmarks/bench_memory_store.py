@@ -0,0 +1,83 @@
+"""
+Long-term memory benchmark: prompt size and lookup latency as memory grows.
+
+For each store size it compares the old approach (load the whole JSON file and
+inject every fact into the prompt) with the indexed store (FTS5/BM25 top-k).
+Token counts use the usual ~4 characters per token approximation.
+
+    python -m benchmarks.bench_memory_store [--sizes 10 1000 100000] [--top-k 5]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from brain.memory_store import MemoryStore
+
+_SUBJECTS = ["sister", "brother", "mother", "friend", "boss", "dog", "car", "phone", "team", "city",
+             "doctor", "teacher", "laptop", "bike", "flat", "school", "gym", "bank", "office", "cousin"]
+_PREDICATES = ["likes", "is called", "lives in", "works at", "prefers", "visited", "owns", "plays",
+               "supports", "studies", "bought", "remembers"]
+_OBJECTS = ["Tokyo", "Mumbai", "cricket", "jazz", "sushi", "Python", "Pepper", "chess", "tea", "Goa",
+            "football", "painting", "Delhi", "coffee", "guitar", "Berlin", "biryani", "yoga", "Kyoto", "Pune"]
+_QUERIES = ["what is my sister called", "where does my brother live", "which team do I support",
+            "what does my dog like", "remind me what phone I bought", "what does my boss prefer"]
+
+
+def _synthetic_facts(count: int, seed: int = 7) -> list[str]:
+    rng = random.Random(seed)
+    return [f"User's {rng.choice(_SUBJECTS)} {rng.choice(_PREDICATES)} {rng.choice(_OBJECTS)} (note {i})"
+            for i in range(count)]
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+def bench_size(count: int, top_k: int, folder: str) -> dict:
+    facts = _synthetic_facts(count)
+
+    # Old approach: JSON file, every fact in every prompt.
+    json_path = os.path.join(folder, f"memory_{count}.json")
+    with open(json_path, "w") as f:
+        json.dump({"facts": facts}, f)
+    start = time.perf_counter()
+    for _ in _QUERIES:
+        with open(json_path, "r") as f:
+            all_facts_block = "\n- ".join(json.load(f)["facts"])
+    json_ms = (time.perf_counter() - start) * 1000 / len(_QUERIES)
+
+    # Indexed store: top-k relevant facts only.
+    store = MemoryStore(os.path.join(folder, f"memory_{count}.db"), legacy_json_path=None)
+    start = time.perf_counter()
+    store.add_facts(facts)
+    insert_s = time.perf_counter() - start
+    start = time.perf_counter()
+    blocks = ["\n- ".join(store.search(query, top_k)) for query in _QUERIES]
+    search_ms = (time.perf_counter() - start) * 1000 / len(_QUERIES)
+    store.close()
+
+    return {
+        "facts": count,
+        "all_tokens": _tokens(all_facts_block),
+        "topk_tokens": max(_tokens(block) for block in blocks),
+        "json_ms": json_ms,
+        "search_ms": search_ms,
+        "insert_s": insert_s,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100000])
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'facts':>8}{'prompt tok (all)':>18}{'prompt tok (top-k)':>20}"
+          f"{'JSON load ms':>14}{'top-k search ms':>17}{'bulk insert s':>15}")
+    with tempfile.TemporaryDirectory() as folder:
+        for count in args.sizes:
+            r = bench_size(count, args.top_k, folder)
+            print(f"{r['facts']:>8}{r['all_tokens']:>18}{r['topk_tokens']:>20}"
+                  f"{r['json_ms']:>14.2f}{r['search_ms']:>17.2f}{r['insert_s']:>15.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Time-to-detect benchmark for `wait_for_text`.
+
+Replays a recorded screen sequence (a folder of PNG frames, sorted by name) as
+if each file were one poll of the device, and compares the old full-screen
+EasyOCR pass with the incremental band engine.
+
+    python -m benchmarks.bench_wait_for_text path/to/frames "Text to find"
+
+Record a sequence with e.g.:
+    for i in $(seq -w 1 15); do adb exec-out screencap -p > frames/$i.png; sleep 1; done
+"""
+import argparse
+import os
+import time
+import numpy as np
+from PIL import Image
+from utils.ocr_engine import IncrementalOCR
+
+
+def load_frames(folder: str) -> list[np.ndarray]:
+    names = sorted(n for n in os.listdir(folder) if n.lower().endswith(".png"))
+    return [np.asarray(Image.open(os.path.join(folder, n)).convert("RGB")) for n in names]
+
+def run_full_frame(reader, frames, text):
+    start = time.perf_counter()
+    for index, frame in enumerate(frames):
+        lines = reader.readtext(frame, detail=0, paragraph=True)
+        if any(text.lower() in line.lower() for line in lines):
+            return index, time.perf_counter() - start
+    return None, time.perf_counter() - start
+
+def run_incremental(reader, frames, text):
+    engine = IncrementalOCR(lambda image: reader.readtext(image, detail=0, paragraph=True))
+    start = time.perf_counter()
+    for index, frame in enumerate(frames):
+        if engine.find_text(frame, text):
+            return index, time.perf_counter() - start, engine.stats
+    return None, time.perf_counter() - start, engine.stats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("frames", help="Folder of PNG frames, replayed in name order.")
+    parser.add_argument("text", help="Text that wait_for_text should detect.")
+    args = parser.parse_args()
+
+    import easyocr
+    frames = load_frames(args.frames)
+    print(f"Loaded {len(frames)} frames. Initializing EasyOCR...")
+    reader = easyocr.Reader(["en"])
+
+    full_index, full_time = run_full_frame(reader, frames, args.text)
+    inc_index, inc_time, stats = run_incremental(reader, frames, args.text)
+
+    print(f"\n{'mode':<14}{'detected at frame':>20}{'OCR time (s)':>16}")
+    print(f"{'full-frame':<14}{str(full_index):>20}{full_time:>16.2f}")
+    print(f"{'incremental':<14}{str(inc_index):>20}{inc_time:>16.2f}")
+    print(f"\nIncremental engine: {stats}")
+    if inc_time > 0:
+        print(f"Speed-up: {full_time / inc_time:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+DuckDuckGo results-page parsing benchmark: the original BeautifulSoup full-tree
+parse against the streaming early-exit parser used by the scraper now.
+
+Run it on saved result pages (save one with e.g.
+`curl -A Mozilla "https://duckduckgo.com/html/?q=python" > page.html`), or
+without arguments on a synthetic 30-result page.
+
+    python -m benchmarks.bench_web_parser [page.html ...] [--repeat 50] [--limit 3]
+"""
+import argparse
+import time
+import tracemalloc
+from utils.web_searcher import parse_results, parse_results_soup
+
+_CHUNK = 16384  # The scraper streams the body in chunks of this size.
+
+
+def synthetic_page(results: int = 30) -> str:
+    head = "<html><head><title>python at DuckDuckGo</title>" + "<style>.x{color:red}</style>" * 40 + "</head><body>"
+    items = []
+    for i in range(results):
+        items.append(
+            f'<div class="result results_links results_links_deep web-result"><div class="links_main links_deep result__body">'
+            f'<h2 class="result__title"><a rel="nofollow" class="result__a" href="https://example.com/{i}">'
+            f'Result number {i} &amp; some <b>bold</b> title</a></h2>'
+            f'<div class="result__extras"><div class="result__extras__url"><a class="result__url" href="https://example.com/{i}">'
+            f'example.com/{i}</a></div></div>'
+            f'<a class="result__snippet" href="https://example.com/{i}">' + "Snippet text for this result. " * 8 +
+            '</a><div class="clear"></div></div></div>')
+    return head + "".join(items) + "</body></html>"
+
+def _chunks(html: str):
+    return (html[i:i + _CHUNK] for i in range(0, len(html), _CHUNK))
+
+def measure(parse, html: str, repeat: int) -> tuple[float, int, list[str]]:
+    """Returns (ms per parse, peak bytes allocated during one parse, results)."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = parse(html)
+    elapsed_ms = (time.perf_counter() - start) * 1000 / repeat
+    tracemalloc.start()
+    parse(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed_ms, peak, results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pages", nargs="*", help="Saved DuckDuckGo HTML result pages.")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = []
+    for path in args.pages:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            pages.append((path, f.read()))
+    if not pages:
+        pages.append(("synthetic (30 results)", synthetic_page()))
+
+    soup = lambda html: parse_results_soup(html, args.limit)
+    streaming = lambda html: parse_results(_chunks(html), args.limit)
+    for name, html in pages:
+        soup_ms, soup_peak, soup_results = measure(soup, html, args.repeat)
+        fast_ms, fast_peak, fast_results = measure(streaming, html, args.repeat)
+        print(f"\n📄 {name}: {len(html) / 1024:.0f} KiB")
+        print(f"   {'parser':<24}{'ms/parse':>10}{'peak KiB':>10}")
+        print(f"   {'BeautifulSoup (full)':<24}{soup_ms:>10.2f}{soup_peak / 1024:>10.0f}")
+        print(f"   {'streaming early-exit':<24}{fast_ms:>10.2f}{fast_peak / 1024:>10.0f}")
+        print(f"   speed-up {soup_ms / fast_ms:.1f}x, memory {soup_peak / max(fast_peak, 1):.1f}x less")
+        print(f"   BeautifulSoup: {soup_results}")
+        print(f"   streaming:     {fast_results}")
+
+if __name__ == "__main__":
+    main()
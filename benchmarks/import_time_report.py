@@ -0,0 +1,71 @@
+"""
+Cold-start report for the server's import graph.
+
+Each measurement runs in a fresh interpreter so nothing is cached in
+`sys.modules`. "eager" reproduces the old behaviour by loading and warming
+every skill module right after import (EasyOCR reader, vision client, ...);
+"lazy" is what `uvicorn server:app` pays now.
+
+    python -m benchmarks.import_time_report [--module server] [--runs 3] [--top 15]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+_PROBE = """
+import json, resource, time
+start = time.perf_counter()
+import {module}
+if {eager}:
+    from device_control.command_executor import _warm_up_sync
+    _warm_up_sync()
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}}))
+"""
+
+
+def measure(module: str, eager: bool) -> dict:
+    result = subprocess.run([sys.executable, "-c", _PROBE.format(module=module, eager=eager)],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def slowest_imports(module: str, top: int) -> list[tuple[int, str]]:
+    """Parses `python -X importtime` and returns the slowest cumulative imports (microseconds)."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append((int(cumulative), name))
+    return sorted(rows, reverse=True)[:top]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="server")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    print(f"{'mode':<8}{'median cold start (s)':>24}{'max RSS (MB)':>16}")
+    for label, eager in (("eager", True), ("lazy", False)):
+        try:
+            runs = [measure(args.module, eager) for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f"{label:<8}  failed: {e}")
+            continue
+        seconds = statistics.median(run["seconds"] for run in runs)
+        rss = max(run["max_rss_mb"] for run in runs)
+        print(f"{label:<8}{seconds:>24.3f}{rss:>16.1f}")
+
+    print(f"\nSlowest imports for 'import {args.module}' (lazy):")
+    for cumulative, name in slowest_imports(args.module, args.top):
+        print(f"  {cumulative / 1000:>9.1f} ms  {name}")
+
+if __name__ == "__main__":
+    main()
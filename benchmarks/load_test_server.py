@@ -0,0 +1,72 @@
+"""
+Concurrency load test for the running Jarvis server.
+
+Posts the same WAV file from N parallel clients for a fixed duration at each
+concurrency level and reports throughput and latency, so you can check that
+requests scale instead of queuing behind one another.
+
+    uvicorn server:app --workers 1
+    python -m benchmarks.load_test_server --levels 1 2 4 8 --duration 20
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+import requests
+
+
+def _client(url: str, audio: bytes, deadline: float, latencies: list, errors: list):
+    session = requests.Session()
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = session.post(url, files={"audio": ("command.wav", audio, "audio/wav")}, timeout=120)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+        except requests.RequestException as e:
+            errors.append(str(e))
+
+def run_level(url: str, audio: bytes, clients: int, duration: float) -> dict:
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=_client, args=(url, audio, deadline, latencies, errors))
+               for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "throughput": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) if latencies else float("nan"),
+        "p95": latencies[int(len(latencies) * 0.95)] if latencies else float("nan"),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000/api/jarvis")
+    parser.add_argument("--audio", default=os.path.join("Data", "command.wav"))
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per concurrency level.")
+    args = parser.parse_args()
+
+    with open(args.audio, "rb") as f:
+        audio = f.read()
+
+    print(f"{'clients':>8}{'requests':>10}{'errors':>8}{'req/s':>9}{'p50 (s)':>10}{'p95 (s)':>10}{'scaling':>9}")
+    baseline = None
+    for clients in args.levels:
+        result = run_level(args.url, audio, clients, args.duration)
+        baseline = baseline or result["throughput"] or None
+        scaling = result["throughput"] / baseline if baseline else float("nan")
+        print(f"{result['clients']:>8}{result['requests']:>10}{result['errors']:>8}{result['throughput']:>9.2f}"
+              f"{result['p50']:>10.2f}{result['p95']:>10.2f}{scaling:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
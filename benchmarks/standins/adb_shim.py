@@ -0,0 +1,137 @@
+"""
+An `adb` stand-in for benchmarks: simulates one Android device on this machine.
+
+`install(directory)` writes an `adb` executable into `directory`. Put that
+directory first on the server's PATH. The shim supports:
+- `adb shell`, both the persistent form and one-shot commands. It runs a real
+  `sh`, with stub device commands (dumpsys, settings, input, am, pm, monkey,
+  cmd, screencap, mkdir, mv, ...) first on its PATH.
+- `adb exec-out screencap [-p]`. This serves a pre-rendered home screen in
+  PNG or raw RGBA.
+- `adb reboot` and `adb devices`.
+
+Every device command sleeps for the configured latency, so skills see a
+realistic round trip. Nothing touches the host outside `directory`.
+
+    python -m benchmarks.standins.adb_shim /tmp/jarvis-adb [--latency-ms 15]
+"""
+import argparse
+import os
+import stat
+import struct
+import numpy as np
+from PIL import Image, ImageDraw
+
+# Stub device commands; each one is a symlink to the same script, dispatched on its name.
+DEVICE_COMMANDS = ["dumpsys", "settings", "input", "am", "pm", "monkey", "cmd", "screencap",
+                   "uiautomator", "wm", "getprop", "svc", "mkdir", "mv", "rm", "reboot"]
+APPS = [("YouTube", "com.google.android.youtube"), ("WhatsApp", "com.whatsapp"),
+        ("Chrome", "com.android.chrome"), ("Settings", "com.android.settings"),
+        ("Spotify", "com.spotify.music"), ("Camera", "com.android.camera2")]
+
+_ADB = """#!/bin/sh
+# Benchmark adb shim (see benchmarks/standins/adb_shim.py).
+DIR="$(cd "$(dirname "$0")" && pwd)"
+[ "$1" = "-s" ] && shift 2
+case "$1" in
+  shell)
+    shift
+    export SHIM_DIR="$DIR"
+    export PATH="$DIR/device:$PATH"
+    if [ $# -eq 0 ]; then exec sh; fi
+    exec sh -c "$*"
+    ;;
+  exec-out)
+    if [ "$2" = "screencap" ]; then
+      sleep {latency}
+      if [ "$3" = "-p" ]; then exec cat "$DIR/screen.png"; fi
+      exec cat "$DIR/screen.raw"
+    fi
+    ;;
+  reboot) exit 0 ;;
+  devices) printf 'List of devices attached\\nemulator-5554\\tdevice\\n\\n'; exit 0 ;;
+esac
+echo "adb shim: unsupported command: $*" >&2
+exit 1
+"""
+
+_DEVICE = """#!/bin/sh
+# A simulated device command (see benchmarks/standins/adb_shim.py).
+sleep {latency}
+case "$(basename "$0")" in
+  dumpsys)
+    if [ "$1" = "battery" ]; then
+      printf 'Current Battery Service state:\\n  AC powered: false\\n  USB powered: true\\n  status: 2\\n'
+      printf '  health: 2\\n  present: true\\n  level: 80\\n  scale: 100\\n  voltage: 4120\\n  temperature: 290\\n'
+    fi ;;
+  settings) [ "$1" = "get" ] && echo 128 ;;
+  cmd) [ "$1" = "package" ] && cat "$SHIM_DIR/launcher_activities.txt" ;;
+  monkey) echo "Events injected: 1" ;;
+  am) echo "Starting: Intent { $* }" ;;
+  pm) echo "Success" ;;
+  getprop) echo "14" ;;
+  uiautomator) echo "UI hierchary dumped to: /sdcard/window_dump.xml" ;;
+esac
+exit 0
+"""
+
+
+def _launcher_dump() -> str:
+    lines = []
+    for index, (label, package) in enumerate(APPS, 1):
+        lines += [f"  Activity #{index}:",
+                  "    priority=0 preferredOrder=0 match=0x108000 specificIndex=-1 isDefault=false",
+                  "    ActivityInfo:",
+                  f"      name={package}.MainActivity",
+                  f"      packageName={package}",
+                  f"      labelRes=0x7f120001 nonLocalizedLabel={label} icon=0x7f080001 banner=0x0"]
+    return f"{len(APPS)} activities found:\n" + "\n".join(lines) + "\n"
+
+def _render_screen(directory: str, width: int, height: int):
+    """Writes a home screen with an icon grid as both PNG and raw screencap output."""
+    image = Image.new("RGB", (width, height), (20, 30, 60))
+    draw = ImageDraw.Draw(image)
+    for row in range(6):
+        for column in range(4):
+            x, y = 80 + column * 250, 300 + row * 320
+            draw.rounded_rectangle((x, y, x + 160, y + 160), 32, fill=(row * 40, 120, column * 60))
+            draw.text((x, y + 180), APPS[(row + column) % len(APPS)][0], fill=(255, 255, 255))
+    draw.text((60, 60), "12:00", fill=(255, 255, 255))
+    image.save(os.path.join(directory, "screen.png"))
+    rgba = np.asarray(image.convert("RGBA"))
+    with open(os.path.join(directory, "screen.raw"), "wb") as f:
+        f.write(struct.pack("<IIII", width, height, 1, 0))  # width, height, RGBA_8888, colour space
+        f.write(rgba.tobytes())
+
+def _write_executable(path: str, text: str):
+    with open(path, "w") as f:
+        f.write(text)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+def install(directory: str, latency_ms: float = 15, width: int = 1080, height: int = 2400) -> str:
+    """Writes the shim into `directory` and returns the directory to put first on PATH."""
+    latency = f"{latency_ms / 1000:.3f}"
+    device_dir = os.path.join(directory, "device")
+    os.makedirs(device_dir, exist_ok=True)
+    _write_executable(os.path.join(directory, "adb"), _ADB.replace("{latency}", latency))
+    _write_executable(os.path.join(directory, "device_command"), _DEVICE.replace("{latency}", latency))
+    for name in DEVICE_COMMANDS:
+        link = os.path.join(device_dir, name)
+        if os.path.lexists(link):
+            os.remove(link)
+        os.symlink(os.path.join(directory, "device_command"), link)
+    with open(os.path.join(directory, "launcher_activities.txt"), "w") as f:
+        f.write(_launcher_dump())
+    _render_screen(directory, width, height)
+    return directory
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory")
+    parser.add_argument("--latency-ms", type=float, default=15, help="Simulated time per device command.")
+    args = parser.parse_args()
+    path = install(os.path.abspath(args.directory), args.latency_ms)
+    print(f"✅ adb shim installed. Use it with: export PATH=\"{path}:$PATH\"")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+A local stand-in for Groq's OpenAI-compatible chat API, for benchmarks.
+
+Replies follow a script keyed by the user's text: each step is either a round
+of tool calls or a final text reply, chosen by how many assistant messages
+follow the last user message. Unscripted text gets a short default reply (this
+also covers the vision calls made by analyze_screen). Both plain and streamed
+(SSE) completions are served, with a configurable time to first token and
+token rate.
+
+    python -m benchmarks.standins.fake_llm --script script.json [--port 8100]
+        [--latency-ms 250] [--tokens-per-second 400]
+
+Point the server at it with GROQ_BASE_URL=http://127.0.0.1:8100 (and any
+GROQ_API_KEY). Script format:
+
+    {"how is my phone holding up": [
+        {"tool_calls": [{"name": "battery_stats", "arguments": {}}]},
+        {"content": "Your battery is at 80 percent, sir."}]}
+"""
+import argparse
+import asyncio
+import json
+import time
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_REPLY = "Certainly, sir. Everything looks fine from here."
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+def _text_of(message: dict) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):  # Vision requests: [{"type": "text", ...}, {"type": "image_url", ...}]
+        content = " ".join(part.get("text", "") for part in content if part.get("type") == "text")
+    return content
+
+
+class ScriptedModel:
+    """Picks the scripted step for a conversation and renders it as completion payloads."""
+
+    def __init__(self, script: dict, latency: float, tokens_per_second: float):
+        self.script = {_normalize(text): steps for text, steps in script.items()}
+        self.latency = latency
+        self.token_delay = 1 / tokens_per_second if tokens_per_second > 0 else 0
+        self.requests = 0
+
+    def step(self, messages: list) -> dict:
+        last_user = max((i for i, m in enumerate(messages) if m.get("role") == "user"), default=-1)
+        if last_user < 0:
+            return {"content": DEFAULT_REPLY}
+        steps = self.script.get(_normalize(_text_of(messages[last_user])))
+        if not steps:
+            return {"content": DEFAULT_REPLY}
+        round_index = sum(1 for m in messages[last_user + 1:] if m.get("role") == "assistant")
+        return steps[min(round_index, len(steps) - 1)]
+
+    @staticmethod
+    def _tool_calls(step: dict) -> list[dict]:
+        return [{"id": f"call_{index}_{int(time.time() * 1000) % 100000}", "type": "function",
+                 "function": {"name": call["name"], "arguments": json.dumps(call.get("arguments", {}))}}
+                for index, call in enumerate(step.get("tool_calls", []))]
+
+    @staticmethod
+    def _usage(messages: list, completion: str) -> dict:
+        # Roughly 4 characters per token, which is all a benchmark needs.
+        prompt_tokens = len(json.dumps(messages)) // 4
+        completion_tokens = max(1, len(completion) // 4)
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens}
+
+    async def complete(self, body: dict) -> dict:
+        self.requests += 1
+        step = self.step(body["messages"])
+        tool_calls = self._tool_calls(step)
+        content = step.get("content")
+        await asyncio.sleep(self.latency + self.token_delay * len((content or "").split()))
+        message = {"role": "assistant", "content": content}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        return {
+            "id": f"chatcmpl-fake{self.requests}", "object": "chat.completion", "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if tool_calls else "stop"}],
+            "usage": self._usage(body["messages"], content or json.dumps(tool_calls)),
+        }
+
+    async def stream(self, body: dict):
+        self.requests += 1
+        step = self.step(body["messages"])
+        tool_calls = self._tool_calls(step)
+        content = step.get("content") or ""
+        base = {"id": f"chatcmpl-fake{self.requests}", "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": body.get("model", "fake")}
+
+        def chunk(delta: dict, finish_reason=None, **extra) -> str:
+            payload = {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}], **extra}
+            return f"data: {json.dumps(payload)}\n\n"
+
+        await asyncio.sleep(self.latency)
+        yield chunk({"role": "assistant", "content": ""})
+        words = content.split(" ") if content else []
+        for index, word in enumerate(words):
+            if index:
+                await asyncio.sleep(self.token_delay)
+            yield chunk({"content": word if index == len(words) - 1 else word + " "})
+        if tool_calls:
+            yield chunk({"tool_calls": [{"index": i, **call} for i, call in enumerate(tool_calls)]})
+        usage = self._usage(body["messages"], content or json.dumps(tool_calls))
+        yield chunk({}, "tool_calls" if tool_calls else "stop", x_groq={"id": base["id"], "usage": usage})
+        yield "data: [DONE]\n\n"
+
+
+def create_app(model: ScriptedModel) -> FastAPI:
+    app = FastAPI()
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        if body.get("stream"):
+            return StreamingResponse(model.stream(body), media_type="text/event-stream")
+        return JSONResponse(await model.complete(body))
+
+    # Groq's SDK uses the /openai prefix; plain OpenAI clients don't.
+    app.add_api_route("/openai/v1/chat/completions", chat_completions, methods=["POST"])
+    app.add_api_route("/v1/chat/completions", chat_completions, methods=["POST"])
+    app.add_api_route("/stats", lambda: {"requests": model.requests}, methods=["GET"])
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--script", help="JSON file mapping user text to reply steps.")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=250, help="Time to first token.")
+    parser.add_argument("--tokens-per-second", type=float, default=400)
+    args = parser.parse_args()
+
+    script = {}
+    if args.script:
+        with open(args.script, "r") as f:
+            script = json.load(f)
+    model = ScriptedModel(script, args.latency_ms / 1000, args.tokens_per_second)
+    uvicorn.run(create_app(model), host="127.0.0.1", port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
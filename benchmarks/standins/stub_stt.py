@@ -0,0 +1,46 @@
+"""
+A stub STT backend for benchmarks: no model, no network.
+
+Benchmark clients send WAV files made by `make_wav`, whose samples start with
+the transcript itself; the backend reads it back after a simulated inference
+delay. Load it in the server with these .env settings:
+
+    STTBackend=benchmarks.standins.stub_stt:StubSTTBackend
+    StubSTTLatencyMs=120   # optional, default 100
+"""
+import io
+import time
+import wave
+from dotenv import dotenv_values
+from utils.stt_processor import STTBackend, _as_pcm_bytes
+
+MAGIC = b"JARVIS-STUB:"
+
+
+def make_wav(text: str, seconds: float = 2.0, sample_rate: int = 16000) -> bytes:
+    """A mono 16-bit WAV of `seconds` length carrying `text` for the stub to 'recognize'."""
+    payload = MAGIC + text.encode("utf-8") + b"\0"
+    payload += b"\0" * (len(payload) % 2)
+    pcm = payload + b"\0" * max(0, int(seconds * sample_rate) * 2 - len(payload))
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(pcm)
+    return buffer.getvalue()
+
+
+class StubSTTBackend(STTBackend):
+    name = "stub"
+
+    def __init__(self):
+        self.latency = float(dotenv_values(".env").get("StubSTTLatencyMs", 100)) / 1000
+
+    def transcribe(self, pcm, sample_rate):
+        # Runs on the executor thread like a real model, so it occupies a worker for its duration.
+        time.sleep(self.latency)
+        data = _as_pcm_bytes(pcm)
+        if not data.startswith(MAGIC):
+            return None
+        return data[len(MAGIC):].split(b"\0", 1)[0].decode("utf-8") or None
@@ -0,0 +1,163 @@
+import asyncio
+import json
+from dotenv import dotenv_values
+
+# --- Configuration ---
+config = dotenv_values(".env")
+HISTORY_TOKEN_BUDGET = int(config.get("HistoryTokenBudget", 6000))
+KEEP_RECENT_TURNS = int(config.get("HistoryKeepTurns", 3))
+SUMMARY_MODEL = config.get("SummaryModel", "openai/gpt-oss-120b")
+_SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:
+    _encoding = None
+
+
+# --- Token Counting ---
+def count_tokens(text: str) -> int:
+    """Exact with tiktoken if it is installed, otherwise the usual ~4 characters per token."""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return max(1, len(text) // 4)
+
+def _field(message, name):
+    # History holds plain dicts (user/tool/assistant text) and SDK message objects (tool calls).
+    return message.get(name) if isinstance(message, dict) else getattr(message, name, None)
+
+def message_tokens(message) -> int:
+    tokens = 4 + count_tokens(_field(message, "content") or "")  # ~4 tokens of role/framing overhead
+    for tool_call in _field(message, "tool_calls") or []:
+        function = tool_call["function"] if isinstance(tool_call, dict) else tool_call.function
+        name = function["name"] if isinstance(function, dict) else function.name
+        arguments = function["arguments"] if isinstance(function, dict) else function.arguments
+        tokens += count_tokens(name) + count_tokens(arguments or "")
+    return tokens
+
+
+class ConversationHistory:
+    """
+    A token-budgeted conversation for long-running sessions.
+
+    `messages` is the live list handed to the orchestrator and is only ever
+    mutated in place. After each turn, `end_turn()`:
+      1. replaces tool payloads older than the last few turns with a short stub
+         (the message stays, so every tool_call_id remains paired with its call);
+      2. if the history is still over budget, folds the oldest whole turns into a
+         rolling summary. The LLM summarization runs as a background task, so the
+         next turn never waits for it.
+    """
+
+    def __init__(self, token_budget: int = HISTORY_TOKEN_BUDGET, keep_recent_turns: int = KEEP_RECENT_TURNS):
+        self.token_budget = token_budget
+        self.keep_recent_turns = keep_recent_turns
+        self.messages = []
+        self.summary = ""
+        self._summary_task = None
+
+    # --- Structure ---
+    def _head_length(self) -> int:
+        """Number of leading system messages (system prompt + rolling summary)."""
+        index = 0
+        while index < len(self.messages) and _field(self.messages[index], "role") == "system":
+            index += 1
+        return index
+
+    def _turns(self) -> list[list]:
+        """Splits the non-system messages into turns, each starting at a user message."""
+        turns = []
+        for message in self.messages[self._head_length():]:
+            if _field(message, "role") == "user" or not turns:
+                turns.append([])
+            turns[-1].append(message)
+        return turns
+
+    def token_count(self) -> int:
+        return sum(message_tokens(m) for m in self.messages)
+
+    # --- Compaction ---
+    def _elide_stale_tool_payloads(self) -> int:
+        saved = 0
+        for turn in self._turns()[:-self.keep_recent_turns or None]:
+            for message in turn:
+                if isinstance(message, dict) and message.get("role") == "tool" \
+                        and not message.get("content", "").startswith("[elided"):
+                    before = message_tokens(message)
+                    message["content"] = f"[elided: {len(message.get('content', ''))} chars of tool output]"
+                    saved += before - message_tokens(message)
+        return saved
+
+    def _turns_to_fold(self) -> list[list]:
+        turns = self._turns()
+        foldable = turns[:-self.keep_recent_turns] if self.keep_recent_turns else turns
+        excess = self.token_count() - self.token_budget
+        selected = []
+        for turn in foldable:
+            if excess <= 0:
+                break
+            selected.append(turn)
+            excess -= sum(message_tokens(m) for m in turn)
+        return selected
+
+    def _set_summary(self, summary: str):
+        self.summary = summary
+        head = self._head_length()
+        summary_message = {"role": "system", "content": _SUMMARY_PREFIX + summary}
+        for index in range(head):
+            content = _field(self.messages[index], "content") or ""
+            if content.startswith(_SUMMARY_PREFIX):
+                self.messages[index] = summary_message
+                return
+        self.messages.insert(head, summary_message)
+
+    async def _fold(self, turns: list[list]):
+        folded = [m for turn in turns for m in turn]
+        try:
+            summary = await _summarize(self.summary, folded)
+        except Exception as e:
+            print(f"⚠️ History summarization failed, keeping turns verbatim: {e}")
+            return
+        # Remove exactly the folded messages; anything appended meanwhile is untouched.
+        folded_ids = {id(m) for m in folded}
+        self.messages[:] = [m for m in self.messages if id(m) not in folded_ids]
+        self._set_summary(summary)
+        print(f"🗜️ Folded {len(turns)} old turn(s) into the summary. History now {self.token_count()} tokens.")
+
+    def end_turn(self):
+        """Compacts after a finished turn and reports token usage. Never blocks on the LLM."""
+        saved = self._elide_stale_tool_payloads()
+        total = self.token_count()
+        print(f"🧾 History: {total} tokens in {len(self._turns())} turn(s) "
+              f"(budget {self.token_budget}, summary {count_tokens(self.summary)}, elided {saved})")
+        if total > self.token_budget and (self._summary_task is None or self._summary_task.done()):
+            turns = self._turns_to_fold()
+            if turns:
+                self._summary_task = asyncio.create_task(self._fold(turns))
+
+
+async def _summarize(previous_summary: str, messages: list) -> str:
+    """Asks the LLM to merge old turns into the rolling summary."""
+    from brain.orchestrator import client
+    transcript = []
+    for message in messages:
+        role = _field(message, "role")
+        content = _field(message, "content") or ""
+        if role == "assistant" and _field(message, "tool_calls"):
+            calls = [(tc.function.name, tc.function.arguments) if not isinstance(tc, dict)
+                     else (tc["function"]["name"], tc["function"]["arguments"])
+                     for tc in _field(message, "tool_calls")]
+            content = (content + " " if content else "") + f"[called tools: {json.dumps(calls)}]"
+        transcript.append(f"{role}: {content}")
+    prompt = (
+        "Update the running summary of a conversation between a user and their voice assistant, Jarvis. "
+        "Keep every durable detail (names, preferences, decisions, open tasks, results the user may refer back to) "
+        "and drop small talk. Reply with the updated summary only, at most 150 words.\n\n"
+        f"CURRENT SUMMARY:\n{previous_summary or '(none)'}\n\nNEW TURNS:\n" + "\n".join(transcript)
+    )
+    response = await client.chat.completions.create(
+        model=SUMMARY_MODEL, messages=[{"role": "user", "content": prompt}], temperature=0.0)
+    return response.choices[0].message.content.strip()
@@ -0,0 +1,222 @@
+import json
+import math
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from dotenv import dotenv_values
+from groq.types.chat import ChatCompletionMessageToolCall
+from groq.types.chat.chat_completion_message_tool_call import Function
+from device_control.command_executor import SKILL_REGISTRY, is_failure, run_tool_calls
+from utils.app_index import get_app_index
+from utils.executor import run_blocking
+
+# --- Configuration ---
+config = dotenv_values(".env")
+# The keyword classifier is off by default; the grammar alone only fires on unambiguous commands.
+USE_CLASSIFIER = config.get("IntentClassifier", "false").lower() == "true"
+CLASSIFIER_THRESHOLD = float(config.get("IntentClassifierThreshold", 0.9))
+
+# Politeness and wake words that carry no intent.
+_FILLER = re.compile(r"\b(?:hey|ok|okay|jarvis|please|kindly|could you|can you|would you|will you|for me|now|sir)\b")
+
+
+def _normalize(utterance: str) -> str:
+    text = utterance.lower().replace("%", " percent")
+    text = re.sub(r"[^\w\s']", " ", text)
+    text = _FILLER.sub(" ", text)
+    return " ".join(text.split())
+
+
+# --- Reply Templates ---
+def _battery_reply(result, args):
+    level = re.search(r"level:\s*(\d+)", result or "")
+    charging = re.search(r"(?:AC|USB|Wireless) powered:\s*true", result or "")
+    if not level:
+        return "I couldn't read the battery status, sir."
+    return f"The battery is at {level.group(1)} percent{', and charging' if charging else ''}, sir."
+
+def _brightness_reply(result, args):
+    return f"The brightness is set to {result.strip()}, sir." if result else "I couldn't read the brightness, sir."
+
+def _done(message):
+    return lambda result, args: message.format(**args)
+
+# Every route checks its result; skills without a specific reply get the generic one.
+_GENERIC_FAILURE_REPLY = "I couldn't do that, sir."
+_FAILURE_REPLIES = {
+    "open_app": "I couldn't open {app_name}, sir.",
+    "battery_stats": "I couldn't read the battery status, sir.",
+    "get_brightness": "I couldn't read the brightness, sir.",
+}
+
+
+# --- Grammar ---
+@dataclass
+class _Route:
+    skill: str
+    pattern: re.Pattern
+    reply: callable
+    extract: callable = None  # Turns the regex groups into skill arguments.
+    resolve: callable = None  # Blocking lookup run off the loop; returns final arguments, or None to use the LLM.
+
+def _brightness_args(groups):
+    level = int(groups["level"])
+    if groups.get("percent"):
+        level = round(level * 255 / 100)
+    return {"level": max(0, min(255, level))}
+
+def _resolve_app(args):
+    # Hand the skill the indexed label, so the reply names the app that is actually opened.
+    # The index is loaded from disk on first use, hence off the event loop.
+    match = get_app_index().resolve(args["app_name"])
+    return {"app_name": match.label} if match else None
+
+_ROUTES = [
+    _Route("set_brightness", re.compile(r"^(?:set|change|make) (?:the )?(?:screen )?brightness (?:to |at )?(?P<level>\d{1,3})(?P<percent> percent)?$"),
+           _done("Brightness set, sir."), _brightness_args),
+    _Route("battery_stats", re.compile(r"^(?:(?:what(?:'s| is) (?:the |my )?)?battery(?: status| level| percentage| stats)?|how much battery(?: is left| do i have)?)$"),
+           _battery_reply),
+    _Route("get_brightness", re.compile(r"^what(?:'s| is) (?:the |my )?(?:screen )?brightness(?: level)?$"),
+           _brightness_reply),
+    _Route("take_screenshot", re.compile(r"^(?:take|capture|grab) (?:a )?screen ?shot$"),
+           _done("Screenshot taken, sir.")),
+    _Route("class_mode_on", re.compile(r"^(?:turn on|enable|activate|start) class mode$|^class mode on$"),
+           _done("Class mode is on, sir.")),
+    _Route("class_mode_off", re.compile(r"^(?:turn off|disable|deactivate|stop) class mode$|^class mode off$"),
+           _done("Class mode is off, sir.")),
+    # Last, so "start class mode" and friends are matched above first.
+    _Route("open_app", re.compile(r"^(?:open|launch|start) (?:up )?(?:the )?(?P<app_name>[\w' ]+?)(?: app| application)?$"),
+           _done("Opening {app_name}, sir."), resolve=_resolve_app),
+]
+
+
+# --- Optional Classifier ---
+class _KeywordClassifier:
+    """
+    A tiny multinomial Naive Bayes over bag-of-words, trained on a handful of
+    example phrasings. It only covers argument-free skills, so a wrong guess
+    can't invent arguments; anything below the confidence threshold goes to the LLM.
+    """
+
+    _EXAMPLES = {
+        "battery_stats": ["how is my battery doing", "check the battery", "battery left", "is the phone charged",
+                          "what's my charge level", "phone battery"],
+        "get_brightness": ["how bright is the screen", "current brightness", "check the brightness"],
+        "take_screenshot": ["screenshot this", "save a screenshot", "snap the screen", "capture what's on screen"],
+        "class_mode_on": ["i'm in class", "silence my phone for class", "going into a lecture"],
+        "class_mode_off": ["class is over", "lecture finished", "unmute my phone after class"],
+    }
+
+    def __init__(self):
+        self._word_counts = {skill: Counter(w for e in examples for w in e.split())
+                             for skill, examples in self._EXAMPLES.items()}
+        self._vocabulary = set().union(*self._word_counts.values())
+
+    def predict(self, text: str) -> tuple[str, float]:
+        words = [w for w in text.split() if w in self._vocabulary]
+        if not words:
+            return None, 0.0
+        log_scores = {}
+        for skill, counts in self._word_counts.items():
+            total = sum(counts.values()) + len(self._vocabulary)
+            log_scores[skill] = sum(math.log((counts[w] + 1) / total) for w in words)
+        best = max(log_scores, key=log_scores.get)
+        normalizer = sum(math.exp(score - log_scores[best]) for score in log_scores.values())
+        return best, 1.0 / normalizer
+
+
+# --- Router ---
+@dataclass
+class RoutedTurn:
+    skill_name: str
+    args: dict
+    tool_call: ChatCompletionMessageToolCall
+    result: object
+    response: str
+    seconds: float
+
+
+class IntentRouter:
+    """
+    A deterministic fast path in front of the LLM. High-confidence device commands
+    are mapped straight to a skill with extracted arguments and answered from a
+    template; everything else returns None so the caller falls back to the LLM.
+    """
+
+    def __init__(self, use_classifier: bool = USE_CLASSIFIER, threshold: float = CLASSIFIER_THRESHOLD):
+        self.classifier = _KeywordClassifier() if use_classifier else None
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self._routed_seconds = 0.0
+        self._llm_turn_seconds = 0.0
+        self._llm_turns = 0
+        self._calls = 0
+
+    def match(self, utterance: str) -> tuple[_Route, dict] | None:
+        """Returns (route, args) for a confident match, else None. Pure and fast; see _Route.resolve."""
+        text = _normalize(utterance)
+        for route in _ROUTES:
+            found = route.pattern.match(text)
+            if found and route.skill in SKILL_REGISTRY:
+                groups = {k: v for k, v in found.groupdict().items() if v is not None}
+                return route, route.extract(groups) if route.extract else groups
+        if self.classifier is not None:
+            skill, confidence = self.classifier.predict(text)
+            if skill and confidence >= self.threshold:
+                return next(r for r in _ROUTES if r.skill == skill), {}
+        return None
+
+    async def try_route(self, utterance: str) -> RoutedTurn | None:
+        """Executes the matched skill and returns the finished turn, or None to fall back to the LLM."""
+        start = time.perf_counter()
+        matched = self.match(utterance)
+        if matched is not None and matched[0].resolve is not None:
+            route, args = matched
+            resolved = await run_blocking(route.resolve, args)
+            matched = (route, resolved) if resolved is not None else None
+        if matched is None:
+            self.misses += 1
+            return None
+        route, args = matched
+        skill_name = route.skill
+        self._calls += 1
+        tool_call = ChatCompletionMessageToolCall(
+            id=f"route_{self._calls}", type="function",
+            function=Function(name=skill_name, arguments=json.dumps(args)))
+        print(f"🚦 Fast path: '{utterance}' -> {skill_name}({args})")
+        result = (await run_tool_calls([tool_call]))[0]
+        if is_failure(result):
+            response = _FAILURE_REPLIES.get(skill_name, _GENERIC_FAILURE_REPLY).format(**args)
+        else:
+            response = route.reply(result, args)
+        elapsed = time.perf_counter() - start
+        self.hits += 1
+        self._routed_seconds += elapsed
+        self.report()
+        return RoutedTurn(skill_name, args, tool_call, result, response, elapsed)
+
+    def record_llm_turn(self, seconds: float):
+        """Callers report how long LLM-handled turns take, to estimate the latency saved per hit."""
+        self._llm_turns += 1
+        self._llm_turn_seconds += seconds
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        routed_avg = self._routed_seconds / self.hits if self.hits else 0.0
+        llm_avg = self._llm_turn_seconds / self._llm_turns if self._llm_turns else None
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "avg_routed_seconds": routed_avg,
+            "avg_llm_turn_seconds": llm_avg,
+            "est_seconds_saved": (llm_avg - routed_avg) * self.hits if llm_avg is not None else None,
+        }
+
+    def report(self):
+        s = self.stats()
+        saved = f", ~{s['est_seconds_saved']:.1f}s saved so far" if s["est_seconds_saved"] is not None else ""
+        print(f"🚦 Router: {s['hits']}/{s['hits'] + s['misses']} turns on the fast path "
+              f"({s['hit_rate']:.0%}), {s['avg_routed_seconds'] * 1000:.0f} ms avg{saved}")
@@ -1,4 +1,3 @@
-import asyncio
 import json
 from brain.orchestrator import client # Reuse our Groq client
 from utils.skills.information_skills import web_search
@@ -16,8 +15,8 @@ async def learn_new_skill(skill_name: str, user_query: str):
         f"using a single, direct 'adb shell' command? The user's original request was '{user_query}'."
     )
     
-    # Use the web_search skill to find information
-    search_results = await asyncio.to_thread(web_search, research_query)
+    # Use the (cached) web search to find information
+    search_results = await web_search(research_query)
     if not search_results or "Sorry sir" in search_results:
         print(" L-1: Web research failed or yielded no results.")
         return False
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+DB_PATH = "Data/long_term_memory.db"
+LEGACY_JSON_PATH = "Data/long_term_memory.json"
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "for", "from", "how", "i", "in",
+    "is", "it", "me", "my", "of", "on", "or", "please", "sir", "tell", "that", "the", "this", "to",
+    "was", "what", "when", "where", "which", "who", "why", "will", "with", "you", "your",
+}
+
+def _tokens(text: str) -> list[str]:
+    return [t for t in _TOKEN_PATTERN.findall(text.lower()) if len(t) > 1 and t not in _STOPWORDS]
+
+def _fact_hash(fact: str) -> str:
+    # Case and whitespace differences don't make a fact new.
+    normalized = " ".join(fact.lower().split())
+    return hashlib.sha1(normalized.encode()).hexdigest()
+
+
+class MemoryStore:
+    """
+    SQLite-backed long-term memory.
+
+    Facts are deduplicated by a hash of their normalized text (O(1) instead of a
+    list scan) and indexed with FTS5, so `search()` returns the top-k facts by
+    BM25 relevance without reading the whole store. On first use the legacy
+    `long_term_memory.json` is imported.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, legacy_json_path: str | None = LEGACY_JSON_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS facts (id INTEGER PRIMARY KEY, hash TEXT UNIQUE NOT NULL, "
+            "fact TEXT NOT NULL, created REAL NOT NULL)")
+        try:
+            self._conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS facts_fts USING fts5(fact)")
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: fall back to an in-process BM25 over all facts.
+            self.has_fts = False
+        self._conn.commit()
+        # Bumped on every successful write; lets callers cache anything derived from memory.
+        self.version = 0
+        if legacy_json_path and self.count() == 0 and os.path.exists(legacy_json_path):
+            self._import_legacy_json(legacy_json_path)
+
+    def _import_legacy_json(self, path: str):
+        try:
+            with open(path, "r") as f:
+                facts = json.load(f).get("facts", [])
+        except (json.JSONDecodeError, AttributeError):
+            return
+        added = self.add_facts(facts)
+        if added:
+            print(f"🧠 Imported {added} fact(s) from {path} into {self.db_path}.")
+
+    # --- Writes ---
+    def add_facts(self, facts: list[str]) -> int:
+        """Adds facts in one transaction, skipping duplicates; returns how many were new."""
+        added = 0
+        with self._lock, self._conn:
+            for fact in facts:
+                fact = fact.strip()
+                if not fact:
+                    continue
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO facts (hash, fact, created) VALUES (?, ?, ?)",
+                    (_fact_hash(fact), fact, time.time()))
+                if cursor.rowcount:
+                    added += 1
+                    if self.has_fts:
+                        self._conn.execute("INSERT INTO facts_fts (rowid, fact) VALUES (?, ?)",
+                                           (cursor.lastrowid, fact))
+            if added:
+                self.version += 1
+        return added
+
+    def add_fact(self, fact: str) -> bool:
+        """Adds a single fact; returns False if it was already known."""
+        return self.add_facts([fact]) == 1
+
+    # --- Reads ---
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM facts").fetchone()[0]
+
+    def all_facts(self) -> list[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT fact FROM facts ORDER BY id")]
+
+    def search(self, query: str, k: int = 5) -> list[str]:
+        """Returns up to k facts most relevant to the query, best first."""
+        terms = list(dict.fromkeys(_tokens(query)))
+        if not terms or k <= 0:
+            return []
+        if not self.has_fts:
+            return self._search_python(terms, k)
+        match = " OR ".join(f'"{term}"' for term in terms)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT fact FROM facts_fts WHERE facts_fts MATCH ? ORDER BY bm25(facts_fts) LIMIT ?",
+                (match, k)).fetchall()
+        return [row[0] for row in rows]
+
+    def _search_python(self, terms: list[str], k: int, k1: float = 1.5, b: float = 0.75) -> list[str]:
+        documents = [(fact, Counter(_tokens(fact))) for fact in self.all_facts()]
+        if not documents:
+            return []
+        average_length = sum(sum(c.values()) for _, c in documents) / len(documents)
+        document_frequency = {term: sum(1 for _, c in documents if term in c) for term in terms}
+        scores = []
+        for fact, counts in documents:
+            length = sum(counts.values())
+            score = 0.0
+            for term in terms:
+                frequency = counts.get(term, 0)
+                if not frequency:
+                    continue
+                containing = document_frequency[term]
+                idf = math.log(1 + (len(documents) - containing + 0.5) / (containing + 0.5))
+                score += idf * frequency * (k1 + 1) / (frequency + k1 * (1 - b + b * length / average_length))
+            if score > 0:
+                scores.append((score, fact))
+        return [fact for _, fact in sorted(scores, key=lambda item: -item[0])[:k]]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# --- Shared Store ---
+_store = None
+_store_lock = threading.Lock()
+
+def get_memory_store() -> MemoryStore:
+    """Returns the process-wide memory store, opening (and migrating) it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = MemoryStore()
+    return _store
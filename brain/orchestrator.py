@@ -1,6 +1,10 @@
-import json
 from dotenv import dotenv_values
 from groq import AsyncGroq
+from groq.types.chat import ChatCompletionMessage, ChatCompletionMessageToolCall
+from groq.types.chat.chat_completion_message_tool_call import Function
+from brain.memory_store import get_memory_store
+from utils.executor import run_blocking
+from utils.tracing import record_tokens, span
 # --- Configuration ---
 config = dotenv_values(".env")
 client = AsyncGroq(
@@ -87,7 +91,11 @@ tools = [
             "description": "Analyzes the current screen content (images and text) to answer a question.",
             "parameters": {
                 "type": "object",
-                "properties": {"question": {"type": "string"}},
+                "properties": {
+                    "question": {"type": "string"},
+                    "region": {"type": "string", "enum": ["full", "top", "middle", "bottom"],
+                               "description": "Part of the screen the question is about, if obvious. Defaults to full."}
+                },
                 "required": ["question"]
             }
         }
@@ -127,10 +135,23 @@ tools = [
     },
 ]
 
-def load_system_prompt():
-    """Loads the simple system prompt and injects dynamic info."""
-    # --- THIS IS THE UPDATED PROMPT ---
-    SYSTEM_PROMPT = """You are Jarvis, an AI assistant for Android with the personality of a witty, concise, and incredibly capable butler. Always address the user as "sir".
+# Shared by every round and request so the tools schema and sampling settings
+# serialize identically each time (a stable prefix for provider-side caching).
+_COMPLETION_ARGS = {
+    "model": "openai/gpt-oss-120b",
+    "tools": tools,
+    "tool_choice": "auto",
+    "temperature": 0.1,
+}
+
+MEMORY_TOP_K = int(config.get("MemoryTopK", 5))
+
+# --- Prompt Cache ---
+# The system prompt holds no per-request data, so every round sends a byte-identical
+# system message and `tools` list, letting the provider's prompt-prefix cache hit.
+# User facts travel in a separate message (see _relevant_facts_message) placed next
+# to the latest user turn.
+SYSTEM_PROMPT = """You are Jarvis, an AI assistant for Android with the personality of a witty, concise, and incredibly capable butler. Always address the user as "sir".
 You have access to a set of tools. Based on the user's request, you MUST decide if it is a simple CONVERSATION or a TASK that requires a tool.
 - If it is a CONVERSATION, you MUST respond conversationally without calling any tools.
 - If it is a TASK, you must respond with the tool calls required to complete it.
@@ -138,46 +159,142 @@ You have access to a set of tools. Based on the user's request, you MUST decide
 **CRITICAL RULE:** For any single user request, you are only allowed to use the `web_search` tool **ONE TIME**. Formulate the best possible search query on your first attempt. If that single search does not provide the answer, you must inform the user that you could not find the information. You are forbidden from repeatedly calling `web_search` in a loop.
 
 - If a tool call returns data, I will send it back to you. You must then formulate the final, natural language answer for the user based on that data.
-User Facts: {user_facts}"""
-    # --- END OF UPDATE ---
-    try:
-        with open("Data/long_term_memory.json", "r") as f: memory = json.load(f)
-        user_facts = "\n- ".join(memory.get("facts", []))
-    except (FileNotFoundError, json.JSONDecodeError): user_facts = "None"
-    return SYSTEM_PROMPT.replace("{user_facts}", user_facts)
+- Facts you remember about the user are provided in a "User Facts" message when they are relevant."""
+_facts_cache = {"key": None, "message": None}
+
+async def _relevant_facts_message(query: str) -> dict | None:
+    """Builds the message with the top-k remembered facts for this query (cached per query and memory version)."""
+    store = await run_blocking(get_memory_store)
+    key = (query, store.version)
+    if _facts_cache["key"] != key:
+        facts = await run_blocking(store.search, query, MEMORY_TOP_K)
+        _facts_cache["message"] = {
+            "role": "system",
+            "content": "User Facts (relevant to this request):\n- " + "\n- ".join(facts),
+        } if facts else None
+        _facts_cache["key"] = key
+    return _facts_cache["message"]
+
+async def _prepare_messages(messages: list) -> list:
+    """
+    Inserts (or refreshes) the system prompt at the head of the conversation and
+    returns the list to send: the conversation with the relevant user facts placed
+    just before the latest user turn, so the cached prefix before it never changes.
+    """
+    if not messages or messages[0]['role'] != 'system':
+        messages.insert(0, {"role": "system", "content": SYSTEM_PROMPT})
+    elif messages[0]['content'] != SYSTEM_PROMPT:
+        messages[0]['content'] = SYSTEM_PROMPT
+
+    for index in range(len(messages) - 1, 0, -1):
+        message = messages[index]
+        if isinstance(message, dict) and message.get("role") == "user":
+            facts_message = await _relevant_facts_message(message["content"])
+            if facts_message is not None:
+                return messages[:index] + [facts_message] + messages[index:]
+            break
+    return messages
+
+# --- Token Accounting ---
+last_usage = {}
 
+def _report_usage(usage):
+    """Records and prints the token counts of one LLM round."""
+    global last_usage
+    if usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", 0) or 0
+    last_usage = {
+        "prompt_tokens": usage.prompt_tokens,
+        "cached_prompt_tokens": cached,
+        "completion_tokens": usage.completion_tokens,
+    }
+    record_tokens(usage.prompt_tokens, cached, usage.completion_tokens)
+    print(f"📏 Tokens: prompt {usage.prompt_tokens} (cached {cached}), completion {usage.completion_tokens}")
+
+def _fallback_message(content: str):
+    return type('obj', (object,), {'tool_calls': None, 'content': content})()
 
 async def get_ai_response(messages: list):
     """Gets a response or a tool call from the SambaCloud LLM."""
-    system_prompt = load_system_prompt()
-    if not messages or messages[0]['role'] != 'system':
-        messages.insert(0, {"role": "system", "content": system_prompt})
-    else:
-        messages[0]['content'] = system_prompt
+    request_messages = await _prepare_messages(messages)
 
     try:
-        response = await client.chat.completions.create(
-            model="openai/gpt-oss-120b",
-            messages=messages,
-            tools=tools,
-            tool_choice="auto",
-            temperature=0.1
-        )
+        with span("llm", stream=False, messages=len(request_messages)) as llm_span:
+            response = await client.chat.completions.create(
+                messages=request_messages,
+                **_COMPLETION_ARGS
+            )
+            if response and response.choices:
+                _report_usage(response.usage)
+                llm_span.set(tool_calls=len(response.choices[0].message.tool_calls or []))
         
         # This validation block will prevent the crash.
         if response and response.choices and len(response.choices) > 0:
             return response.choices[0].message
         else:
             print(f"⚠️ Invalid or empty response received from the AI model: {response}")
-            return type('obj', (object,), {
-                'tool_calls': None,
-                'content': "I'm sorry, sir, I received an empty response from my core intelligence."
-            })()
+            return _fallback_message("I'm sorry, sir, I received an empty response from my core intelligence.")
             
     except Exception as e:
         print(f"An unexpected error occurred in get_ai_response: {e}")
-        return type('obj', (object,), {
-            'tool_calls': None,
-            'content': "I've run into an unexpected issue with my connection to the new AI model, sir."
-        })()
+        return _fallback_message("I've run into an unexpected issue with my connection to the new AI model, sir.")
+
+async def stream_ai_response(messages: list):
+    """
+    Streaming variant of get_ai_response.
+    Yields ("token", text) for every content delta as it arrives, then a single
+    ("message", message) with the assembled reply (content and/or tool calls).
+    """
+    request_messages = await _prepare_messages(messages)
+    content_parts = []
+    partial_tool_calls = {}
+
+    try:
+        with span("llm", stream=True, messages=len(request_messages)) as llm_span:
+            stream = await client.chat.completions.create(
+                messages=request_messages,
+                **_COMPLETION_ARGS,
+                stream=True
+            )
+            async for chunk in stream:
+                # Groq reports usage on the final chunk.
+                if chunk.x_groq is not None and chunk.x_groq.usage is not None:
+                    _report_usage(chunk.x_groq.usage)
+                elif getattr(chunk, "usage", None) is not None:
+                    _report_usage(chunk.usage)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    if not content_parts:
+                        llm_span.set(first_token_ms=round(llm_span.duration * 1000, 1))
+                    content_parts.append(delta.content)
+                    yield "token", delta.content
+                # Tool calls arrive in fragments keyed by index; stitch them back together.
+                for fragment in delta.tool_calls or []:
+                    call = partial_tool_calls.setdefault(fragment.index, {"id": None, "name": "", "arguments": ""})
+                    if fragment.id:
+                        call["id"] = fragment.id
+                    if fragment.function:
+                        call["name"] += fragment.function.name or ""
+                        call["arguments"] += fragment.function.arguments or ""
+            llm_span.set(tool_calls=len(partial_tool_calls))
+    except Exception as e:
+        print(f"An unexpected error occurred in stream_ai_response: {e}")
+        yield "message", _fallback_message("I've run into an unexpected issue with my connection to the new AI model, sir.")
+        return
+
+    if not content_parts and not partial_tool_calls:
+        print("⚠️ Empty streamed response received from the AI model.")
+        yield "message", _fallback_message("I'm sorry, sir, I received an empty response from my core intelligence.")
+        return
 
+    tool_calls = [
+        ChatCompletionMessageToolCall(id=call["id"], type="function",
+                                      function=Function(name=call["name"], arguments=call["arguments"]))
+        for _, call in sorted(partial_tool_calls.items())
+    ]
+    yield "message", ChatCompletionMessage(role="assistant", content="".join(content_parts) or None,
+                                           tool_calls=tool_calls or None)
@@ -1,113 +1,252 @@
 import os
-import struct
+import time
 import wave
+import asyncio
+import threading
+from dataclasses import dataclass
+import numpy as np
 import pyaudio
 import pvporcupine
 import pvcobra
 from dotenv import dotenv_values
 
+from core.pcm_ring import PCMRing, native_process
+
 # --- Configuration ---
 config = dotenv_values(".env")
 PICOVOICE_KEY = config.get("PicovoiceAccessKey")
 MODEL_PATH = "hotword_model/hey_jarvis.ppn"
+SAMPLE_RATE = 16000 # Porcupine and Cobra both process 16 kHz, 16-bit mono audio
+# Audio kept from just before the hotword fired, so a command said in the same breath isn't clipped.
+PRE_ROLL_SECONDS = float(config.get("AudioPreRoll", 0.3))
+SILENCE_SECONDS = float(config.get("AudioSilenceSeconds", 1.5))
+MAX_COMMAND_SECONDS = float(config.get("AudioMaxCommandSeconds", 15))
+MIN_VOICE_SECONDS = 0.2
+VAD_THRESHOLD = 0.3
+# A lost microphone is retried with exponential backoff up to this many seconds apart.
+REOPEN_MAX_BACKOFF = 30.0
 
-# --- Audio Recording and VAD ---
-pa = None
-audio_stream = None
-porcupine = None
-cobra = None
 
-def listen_and_record() -> str | None:
+@dataclass
+class CommandSegment:
+    """One spoken command, captured in memory."""
+    pcm: np.ndarray       # int16 mono PCM, pre-roll included
+    sample_rate: int
+    detected_at: float    # time.time() when the hotword fired
+    stt_stream: object = None  # The STT stream that was fed while recording, if any
+
+
+class AudioEngine:
     """
-    A professional-grade listening loop that uses Porcupine for hotword
-    and Cobra for Voice Activity Detection to record a clean command.
+    The always-on microphone. PyAudio, Porcupine and Cobra are opened once and
+    kept for the lifetime of the process; a capture thread reads the input
+    stream continuously, keeps a short pre-roll ring buffer while waiting for
+    the hotword, records until Cobra hears silence, and hands each command to
+    the event loop through an async queue (`next_command()`).
+
+    Because the stream is never closed between commands, nothing said right
+    after the hotword is lost to re-initialization. If the capture thread ends
+    (stopped or crashed), `next_command()` raises instead of waiting forever.
     """
-    global pa, audio_stream, porcupine, cobra
-    
-    command_audio_path = "Data/command.wav"
 
-    try:
-        porcupine = pvporcupine.create(
+    def __init__(self, stt_stream_factory=None, pre_roll: float = PRE_ROLL_SECONDS,
+                 silence_seconds: float = SILENCE_SECONDS, queue_size: int = 4):
+        self.stt_stream_factory = stt_stream_factory
+        self.pre_roll = pre_roll
+        self.silence_seconds = silence_seconds
+        self.queue_size = queue_size
+        self._porcupine = None
+        self._cobra = None
+        self._pa = None
+        self._stream = None
+        self._loop = None
+        self._queue = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    # --- Lifecycle ---
+    def _open_detectors(self):
+        self._porcupine = pvporcupine.create(
             access_key=PICOVOICE_KEY,
-            keyword_paths=[MODEL_PATH], 
+            keyword_paths=[MODEL_PATH],
             sensitivities=[0.7]
         )
-        
-        # --- THIS IS THE CRITICAL FIX ---
-        # The correct function is pvcobra.Cobra(), not .create()
-        cobra = pvcobra.create(
-            access_key=PICOVOICE_KEY
-        )
-        # --- END OF FIX ---
-        
-        pa = pyaudio.PyAudio()
+        self._cobra = pvcobra.create(access_key=PICOVOICE_KEY)
+        self._pa = pyaudio.PyAudio()
 
-        audio_stream = pa.open(
-            rate=porcupine.sample_rate,
+    def _open_stream(self):
+        self._stream = self._pa.open(
+            rate=self._porcupine.sample_rate,
             channels=1,
             format=pyaudio.paInt16,
             input=True,
-            frames_per_buffer=porcupine.frame_length)
+            frames_per_buffer=self._porcupine.frame_length)
+
+    def start(self):
+        """Opens the audio handles and starts capturing. Call from the event loop."""
+        if self._thread is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._open_detectors()
+        self._open_stream()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._capture_loop, name="jarvis-audio", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _close(self):
+        if self._stream is not None: self._stream.close()
+        if self._pa is not None: self._pa.terminate()
+        if self._cobra is not None: self._cobra.delete()
+        if self._porcupine is not None: self._porcupine.delete()
+        self._stream = self._pa = self._cobra = self._porcupine = None
+
+    # --- Consumers ---
+    async def next_command(self) -> CommandSegment:
+        """Waits for the next spoken command; raises RuntimeError once capture has ended."""
+        item = await self._queue.get()
+        if isinstance(item, Exception):
+            self._queue.put_nowait(item) # Later callers fail the same way.
+            raise item
+        return item
+
+    def _publish(self, segment: CommandSegment):
+        def put():
+            if self._queue.qsize() >= self.queue_size:
+                self._queue.get_nowait()
+                print("⚠️ Commands are arriving faster than they are handled; dropped the oldest.")
+            self._queue.put_nowait(segment)
+        self._loop.call_soon_threadsafe(put)
+
+    def _publish_closed(self, error: Exception | None):
+        """Wakes next_command() once the capture thread has ended."""
+        closed = RuntimeError("The audio engine stopped" + (f": {error}" if error else "."))
+        closed.__cause__ = error
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, closed)
+        except RuntimeError:
+            pass # The event loop is already closed; nobody is waiting.
 
+    # --- Capture Thread ---
+    def _read_frame(self) -> bytes:
+        try:
+            return self._stream.read(self._porcupine.frame_length, exception_on_overflow=False)
+        except OSError as e:
+            # The input device went away; reopen it and carry on.
+            print(f"⚠️ Audio input error ({e}); reopening the microphone...")
+            self._reopen_stream()
+            return b""
+
+    def _reopen_stream(self):
+        """Retries opening the input stream with backoff until it works or the engine is stopped."""
+        delay = 1.0
+        while not self._stop.is_set():
+            if self._stream is not None:
+                try:
+                    self._stream.close()
+                except Exception:
+                    pass
+                self._stream = None
+            if self._stop.wait(delay):
+                return
+            try:
+                self._open_stream()
+                print("🎤 Microphone reopened.")
+                return
+            except (OSError, ValueError) as e:
+                delay = min(delay * 2, REOPEN_MAX_BACKOFF)
+                print(f"⚠️ Could not reopen the microphone ({e}); retrying in {delay:.0f}s...")
+
+    def _capture_loop(self):
+        frame_length = self._porcupine.frame_length
+        frames_per_second = self._porcupine.sample_rate / frame_length
+        pre_roll_frames = max(1, int(self.pre_roll * frames_per_second))
+        silence_limit = int(self.silence_seconds * frames_per_second)
+        max_frames = int(MAX_COMMAND_SECONDS * frames_per_second)
+        min_voiced = int(MIN_VOICE_SECONDS * frames_per_second)
+        ring = PCMRing(pre_roll_frames + max_frames, frame_length)
+        hotword, voice_probability = native_process(self._porcupine), native_process(self._cobra)
+
+        start = None  # Ring index where the current command begins, or None while sleeping
+        asleep_since = 0  # The pre-roll never reaches back into the previous command
         print("💤 Sleeping... (Listening for 'Jarvis')")
-        
-        # 1. Hotword Detection Loop
-        while True:
-            # Read audio as raw bytes
-            pcm_bytes = audio_stream.read(porcupine.frame_length, exception_on_overflow=False)
-            # Unpack bytes into integers for processing
-            pcm_unpacked = struct.unpack_from("h" * porcupine.frame_length, pcm_bytes)
-            
-            if porcupine.process(pcm_unpacked) >= 0:
-                print("✅ Hotword Detected! Now listening for command...")
-                break
-
-        # 2. VAD and Recording Loop
-        frames = []
-        # Add the last audio chunk to the buffer to catch commands spoken immediately
-        frames.append(pcm_bytes)
-        
-        silence_frames = 0
-        silence_threshold = int(cobra.sample_rate / porcupine.frame_length * 1.5) # 1.5s of silence
-
-        while True:
-            pcm_bytes = audio_stream.read(porcupine.frame_length, exception_on_overflow=False)
-            frames.append(pcm_bytes) # Append raw bytes for saving
-            
-            # Unpack for VAD processing
-            pcm_unpacked = struct.unpack_from("h" * porcupine.frame_length, pcm_bytes)
-            
-            voice_activity = cobra.process(pcm_unpacked)
-            if voice_activity > 0.3:
-                silence_frames = 0
-            else:
-                silence_frames += 1
-            
-            if silence_frames > silence_threshold:
-                print("👂 Silence detected. Recording finished.")
-                break
-
-        # Ensure we have a meaningful amount of audio before saving
-        min_frames = int(cobra.sample_rate * 0.5 / porcupine.frame_length)
-        if len(frames) < min_frames:
-            print("🎤 Command too short or empty. Ignoring.")
-            return None
-
-        # Save the recorded audio to a file
-        with wave.open(command_audio_path, 'wb') as wf:
-            wf.setnchannels(1)
-            wf.setsampwidth(pa.get_sample_size(pyaudio.paInt16))
-            wf.setframerate(porcupine.sample_rate)
-            wf.writeframes(b''.join(frames))
-        
-        return command_audio_path
-
-    except Exception as e:
-        print(f"An error occurred in the audio loop: {e}")
-        return None
-    finally:
-        # Cleanup all resources
-        if audio_stream is not None: audio_stream.close()
-        if pa is not None: pa.terminate()
-        if cobra is not None: cobra.delete()
-        if porcupine is not None: porcupine.delete()
+        error = None
+        try:
+            while not self._stop.is_set():
+                pcm_bytes = self._read_frame()
+                if len(pcm_bytes) < frame_length * 2:
+                    continue
+                frame = ring.write(pcm_bytes)
+
+                # 1. Hotword detection; the ring doubles as the pre-roll buffer
+                if start is None:
+                    if hotword(frame) >= 0:
+                        print("✅ Hotword Detected! Now listening for command...")
+                        detected_at = time.time()
+                        start = max(asleep_since, ring.written - pre_roll_frames)
+                        stt_stream = self.stt_stream_factory() if self.stt_stream_factory else None
+                        if stt_stream is not None:
+                            stt_stream.feed(ring.window(start))
+                        partial_text = None
+                        silence_frames = voiced_frames = 0
+                    continue
+
+                # 2. VAD and recording
+                if stt_stream is not None:
+                    partial = stt_stream.feed(pcm_bytes)
+                    if partial and partial != partial_text:
+                        partial_text = partial
+                        print(f"📝 ...{partial_text}")
+                if voice_probability(frame) > VAD_THRESHOLD:
+                    silence_frames = 0
+                    voiced_frames += 1
+                else:
+                    silence_frames += 1
+
+                if silence_frames > silence_limit or ring.written - start >= max_frames:
+                    if voiced_frames < min_voiced:
+                        print("🎤 Command too short or empty. Ignoring.")
+                    else:
+                        print("👂 Silence detected. Recording finished.")
+                        # One copy of the slice: the ring keeps being overwritten after this.
+                        self._publish(CommandSegment(ring.window(start).copy(), self._porcupine.sample_rate,
+                                                     detected_at, stt_stream))
+                    start = None
+                    asleep_since = ring.written
+                    print("💤 Sleeping... (Listening for 'Jarvis')")
+        except Exception as e:
+            print(f"An error occurred in the audio loop: {e}")
+            error = e
+        finally:
+            self._close()
+            self._publish_closed(error)
+
+
+def listen_and_record() -> str | None:
+    """
+    Records one command and saves it to Data/command.wav
+    (useful for producing a sample file for test_client.py).
+    """
+    command_audio_path = "Data/command.wav"
+
+    async def _record_one():
+        engine = AudioEngine()
+        engine.start()
+        try:
+            return await engine.next_command()
+        finally:
+            engine.stop()
+
+    segment = asyncio.run(_record_one())
+    with wave.open(command_audio_path, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2) # 16-bit PCM
+        wf.setframerate(segment.sample_rate)
+        wf.writeframes(segment.pcm.tobytes())
+    return command_audio_path
@@ -1,72 +1,188 @@
+import io
 import os
+import re
 import time
+import queue
 import asyncio
+import threading
+from collections import OrderedDict
 import pygame
 import edge_tts
 from dotenv import dotenv_values
 
+from utils.tracing import span
+
 # --- Configuration ---
 # Loads your settings from the .env file.
 config = dotenv_values(".env")
 ENGLISH_VOICE = config.get("EnglishVoice", "en-CA-LiamNeural")
 HINDI_VOICE = config.get("HindiVoice", "hi-IN-MadhurNeural")
-AUDIO_FILE_PATH = "Data/speech.mp3"
+PITCH = "+5Hz"
+RATE = "+13%"
+LANGUAGE_STATE_PATH = "Data/language_state.txt"
+# Phrase cache limits: short, frequently repeated lines ("Checking that, sir.") are kept as audio.
+PHRASE_CACHE_MAX_ENTRIES = int(config.get("TTSCacheEntries", 64))
+PHRASE_CACHE_MAX_BYTES = int(config.get("TTSCacheBytes", 8 * 1024 * 1024))
+PHRASE_CACHE_MAX_CHARS = 160
 
 # --- Initialization ---
 # Initializes the Pygame audio mixer when the program starts.
 pygame.mixer.init()
 
-# --- Helper function to play audio ---
-def _play_audio_sync():
-    """
-    This is a synchronous (blocking) function that handles playing the audio file.
-    It's designed to be run in a separate thread so it doesn't freeze the assistant.
-    """
+# --- Language State ---
+# Held in memory; the file is only re-read when its modification time changes.
+_language = "english"
+_language_mtime = None
+
+def _current_voice() -> str:
+    global _language, _language_mtime
     try:
-        # Load the generated MP3 file into the music player.
-        pygame.mixer.music.load(AUDIO_FILE_PATH)
-        # Play the audio.
-        pygame.mixer.music.play()
-        # This loop waits until the music has completely finished playing.
-        while pygame.mixer.music.get_busy():
-            pygame.time.Clock().tick(10)
-        # Crucially, unload the music to release the file lock.
-        pygame.mixer.music.unload()
-    except Exception as e:
-        print(f"Error playing audio: {e}")
-    finally:
-        # This 'finally' block ensures the audio file is ALWAYS deleted afterwards.
-        if os.path.exists(AUDIO_FILE_PATH):
-           try:
-               # Added a tiny delay to ensure the OS has released the file lock.
-               time.sleep(0.1)
-               os.remove(AUDIO_FILE_PATH)
-           except PermissionError as e:
-               print(f"Could not remove audio file (it might be in use): {e}")
+        mtime = os.stat(LANGUAGE_STATE_PATH).st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+        _language = "english" # Defaults to English if the file doesn't exist.
+    if mtime is not None and mtime != _language_mtime:
+        with open(LANGUAGE_STATE_PATH, "r") as f:
+            _language = f.read().strip()
+    _language_mtime = mtime
+    return HINDI_VOICE if _language == "hindi" else ENGLISH_VOICE
+
+# --- Phrase Cache ---
+class _PhraseCache:
+    """An LRU of synthesized audio keyed by (text, voice, pitch, rate), capped by entries and bytes."""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple, bytes] = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> bytes | None:
+        audio = self._entries.get(key)
+        if audio is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return audio
+
+    def put(self, key: tuple, audio: bytes):
+        if key in self._entries or len(audio) > self.max_bytes:
+            return
+        self._entries[key] = audio
+        self._size += len(audio)
+        while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+phrase_cache = _PhraseCache(PHRASE_CACHE_MAX_ENTRIES, PHRASE_CACHE_MAX_BYTES)
+
+async def _synthesize(text: str, voice: str) -> bytes:
+    """Streams edge-tts audio chunks straight into memory, serving repeated phrases from the cache."""
+    key = (text, voice, PITCH, RATE)
+    cacheable = len(text) <= PHRASE_CACHE_MAX_CHARS
+    if cacheable and (audio := phrase_cache.get(key)) is not None:
+        return audio
+
+    buffer = io.BytesIO()
+    with span("tts", chars=len(text), voice=voice) as tts_span:
+        communicate = edge_tts.Communicate(text, voice, pitch=PITCH, rate=RATE)
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                buffer.write(chunk["data"])
+        tts_span.set(audio_bytes=buffer.tell())
+    audio = buffer.getvalue()
+    if cacheable and audio:
+        phrase_cache.put(key, audio)
+    return audio
+
+# --- Playback Queue ---
+# One long-lived player thread plays clips in the order they are queued.
+_playback_queue = queue.Queue()
+_player_thread = None
+
+def _player_loop():
+    clock = pygame.time.Clock()
+    while True:
+        audio, on_done = _playback_queue.get()
+        try:
+            # Pygame decodes the MP3 straight from memory; nothing touches the disk.
+            pygame.mixer.music.load(io.BytesIO(audio), "mp3")
+            pygame.mixer.music.play()
+            # This loop waits until the clip has completely finished playing.
+            while pygame.mixer.music.get_busy():
+                clock.tick(10)
+            pygame.mixer.music.unload()
+        except Exception as e:
+            print(f"Error playing audio: {e}")
+        finally:
+            on_done()
+
+def _enqueue_playback(audio: bytes) -> asyncio.Future:
+    """Queues a clip for playback; the returned future resolves once it has finished playing."""
+    global _player_thread
+    if _player_thread is None or not _player_thread.is_alive():
+        _player_thread = threading.Thread(target=_player_loop, name="tts-player", daemon=True)
+        _player_thread.start()
+    loop = asyncio.get_running_loop()
+    finished = loop.create_future()
+    def _on_done():
+        loop.call_soon_threadsafe(lambda: finished.done() or finished.set_result(None))
+    _playback_queue.put((audio, _on_done))
+    return finished
 
 # --- Main Speak Function ---
 async def speak(text: str):
     """
     This is the main asynchronous function for text-to-speech.
-    It generates the audio file and then calls the playback function.
+    It synthesizes the text in memory and waits for it to finish playing.
     """
     try:
-        # Reads the language_state.txt file to decide which voice to use.
-        try:
-            with open("Data/language_state.txt", "r") as f:
-                language = f.read().strip()
-        except FileNotFoundError:
-            language = "english" # Defaults to English if the file doesn't exist.
-
-        voice_to_use = HINDI_VOICE if language == "hindi" else ENGLISH_VOICE
-        
-        # Generates the MP3 file from the text using edge-tts.
-        communicate = edge_tts.Communicate(text, voice_to_use, pitch="+5Hz", rate="+13%")
-        await communicate.save(AUDIO_FILE_PATH)
-        
-        # Runs the blocking _play_audio_sync function in a separate thread.
-        # This is the correct way to handle blocking code in an async program.
-        await asyncio.to_thread(_play_audio_sync)
+        audio = await _synthesize(text, _current_voice())
+        await _enqueue_playback(audio)
     except Exception as e:
         print(f"An error occurred during text-to-speech: {e}")
 
+# --- Sentence-Pipelined Streaming ---
+# A sentence ends at ., !, ? or … followed by whitespace, or at a line break.
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?…])\s+|\n+")
+# Very short fragments ("Dr.", "1.") are merged into the next sentence.
+_MIN_SENTENCE_CHARS = 12
+
+async def _split_sentences(chunks):
+    """Regroups a stream of text fragments (e.g. LLM tokens) into whole sentences."""
+    buffer = ""
+    async for chunk in chunks:
+        buffer += chunk
+        start = 0
+        for boundary in _SENTENCE_BOUNDARY.finditer(buffer):
+            sentence = buffer[start:boundary.start()].strip()
+            if len(sentence) >= _MIN_SENTENCE_CHARS:
+                yield sentence
+                start = boundary.end()
+        buffer = buffer[start:]
+    if buffer.strip():
+        yield buffer.strip()
+
+async def speak_stream(chunks):
+    """
+    Speaks text while it is still being generated.
+    Each sentence is synthesized as soon as it is complete, and synthesis of the
+    next sentence overlaps playback of the current one.
+    """
+    voice_to_use = _current_voice()
+    started = time.perf_counter()
+    last_clip = None
+    async for sentence in _split_sentences(chunks):
+        try:
+            audio = await _synthesize(sentence, voice_to_use)
+        except Exception as e:
+            print(f"An error occurred during text-to-speech: {e}")
+            continue
+        if last_clip is None:
+            print(f"🔊 First audio after {(time.perf_counter() - started) * 1000:.0f} ms")
+        last_clip = _enqueue_playback(audio)
+    if last_clip is not None:
+        await last_clip
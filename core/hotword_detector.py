@@ -1,5 +1,4 @@
 import os
-import struct
 import pyaudio
 import pvporcupine
 from dotenv import dotenv_values
@@ -45,7 +44,7 @@ def listen_for_hotword():
 
         while True:
             pcm = audio_stream.read(porcupine.frame_length)
-            pcm = struct.unpack_from("h" * porcupine.frame_length, pcm)
+            pcm = memoryview(pcm).cast("h") # A view of the 16-bit samples, no tuple per frame
             
             result = porcupine.process(pcm)
             if result >= 0:
@@ -1,37 +1,75 @@
 import asyncio
 import json
+import time
 
-from core.audio_manager import listen_and_record
-from utils.stt_processor import transcribe_audio
-from brain.orchestrator import get_ai_response
-from device_control.command_executor import execute_tool_call
-from core.audio_manager_tts_only import speak
-from utils.app_manager import sync_app_list
+from core.audio_manager import SAMPLE_RATE, AudioEngine
+from utils.stt_processor import get_backend
+from brain.orchestrator import stream_ai_response
+from brain.history_manager import ConversationHistory
+from brain.intent_router import IntentRouter
+from device_control.command_executor import run_tool_calls
+from core.audio_manager_tts_only import speak, speak_stream
+from utils.app_manager import start_app_sync
+from utils.loop_monitor import start_loop_monitor
 
 async def main_loop():
     """The main agentic loop for the assistant."""
-    messages = []
+    # Token-budgeted: old tool output is elided and old turns are summarized in the background.
+    history = ConversationHistory()
+    messages = history.messages
+    stt_backend = get_backend() # Loads the STT model once and keeps it resident.
+    intent_router = IntentRouter()
+    # The microphone stays open for the whole session; each command is fed to
+    # the STT engine while it is being recorded.
+    audio_engine = AudioEngine(stt_stream_factory=lambda: stt_backend.open_stream(SAMPLE_RATE))
+    audio_engine.start()
     while True:
         print("\n" + "="*50)
-        recorded_audio_path = await asyncio.to_thread(listen_and_record)
-        if not recorded_audio_path: continue
+        segment = await audio_engine.next_command()
 
-        user_query = transcribe_audio(recorded_audio_path)
+        user_query = await asyncio.to_thread(segment.stt_stream.finish)
         if not user_query: continue
         
         print(f"🎧 You said: {user_query}")
         messages.append({"role": "user", "content": user_query})
 
+        # Common device commands skip the LLM entirely.
+        routed = await intent_router.try_route(user_query)
+        if routed:
+            print(f"🤖 Jarvis: {routed.response}")
+            await speak(routed.response)
+            messages.append({"role": "assistant", "content": routed.response})
+            history.end_turn()
+            continue
+        turn_start = time.perf_counter()
+
+        # Text is spoken sentence by sentence while the model is still generating it.
+        speech_queue = asyncio.Queue()
+        async def _speech_chunks():
+            while (chunk := await speech_queue.get()) is not None:
+                yield chunk
+        speaker = asyncio.create_task(speak_stream(_speech_chunks()))
+
         # --- The Agentic Loop ---
         while True:
             print("🧠 Thinking...")
-            ai_response_message = await get_ai_response(messages)
+            ai_response_message = None
+            streamed_text = False
+            async for kind, payload in stream_ai_response(messages):
+                if kind == "token":
+                    speech_queue.put_nowait(payload)
+                    streamed_text = True
+                else:
+                    ai_response_message = payload
 
             if ai_response_message.tool_calls:
                 print(f"🛠️ AI wants to use tools: {[tc.function.name for tc in ai_response_message.tool_calls]}")
+                if streamed_text:
+                    speech_queue.put_nowait("\n") # Flush any preamble before the tools run.
                 messages.append(ai_response_message)
                 
-                tool_results = await asyncio.gather(*[execute_tool_call(tc) for tc in ai_response_message.tool_calls])
+                # Reads run in parallel; device actions run in call order under the device lock.
+                tool_results = await run_tool_calls(ai_response_message.tool_calls)
                 
                 for i, tool_call in enumerate(ai_response_message.tool_calls):
                     messages.append({
@@ -43,17 +81,28 @@ async def main_loop():
                 # Go back to the brain to process the tool's result
                 continue 
             else:
-                # If the AI responds with text, speak it and end the turn.
+                # If the AI responds with text, finish speaking it and end the turn.
                 final_response = ai_response_message.content
                 print(f"🤖 Jarvis: {final_response}")
-                await speak(final_response)
+                if not streamed_text and final_response:
+                    # Fallback replies (errors, empty responses) are not streamed.
+                    speech_queue.put_nowait(final_response)
+                speech_queue.put_nowait(None)
+                await speaker
                 messages.append({"role": "assistant", "content": final_response})
+                history.end_turn()
+                intent_router.record_llm_turn(time.perf_counter() - turn_start)
                 break # Exit the inner loop and wait for the next hotword
 
 async def startup():
     print("🤖 Assistant is starting up...")
-    sync_app_list()
-    await main_loop()
+    # Runs in the background; open_app uses the last saved list until the scan finishes.
+    app_sync_task = start_app_sync()
+    start_loop_monitor()
+    try:
+        await main_loop()
+    finally:
+        app_sync_task.cancel()
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,62 @@
+import ctypes
+import numpy as np
+
+
+class PCMRing:
+    """
+    A preallocated int16 ring of fixed-size frames. Every frame is stored twice,
+    at slot i and i + capacity, so any window of up to `capacity` frames is one
+    contiguous slice of the buffer: a recorded command never has to be joined.
+    """
+
+    def __init__(self, capacity: int, frame_length: int):
+        self.capacity = capacity
+        self.frame_length = frame_length
+        self.written = 0  # Frames written since creation; also the absolute index of the next frame
+        self._buffer = np.zeros((2 * capacity, frame_length), dtype=np.int16)
+        # Created once; see native_process() for how the detectors read them without a copy.
+        self._views = [memoryview(row) for row in self._buffer[:capacity]]
+
+    def write(self, pcm: bytes) -> memoryview:
+        """Copies one frame in and returns a writable view of it for the detectors."""
+        frame = np.frombuffer(pcm, dtype=np.int16)
+        slot = self.written % self.capacity
+        self._buffer[slot] = frame
+        self._buffer[slot + self.capacity] = frame
+        self.written += 1
+        return self._views[slot]
+
+    def window(self, start: int) -> np.ndarray:
+        """Frames from absolute index `start` up to the newest one, as a flat view (no copy)."""
+        count = self.written - start
+        if not 0 <= count <= self.capacity:
+            raise ValueError(f"Frames {start}..{self.written} are not in the ring.")
+        slot = start % self.capacity
+        return self._buffer[slot:slot + count].reshape(-1)
+
+
+def native_process(detector):
+    """
+    Returns `detector.process`, minus its per-frame copy, for ring frames.
+
+    The Porcupine and Cobra wrappers rebuild every frame as `(c_short * n)(*pcm)`,
+    one Python int at a time, which costs far more than everything else in the
+    capture loop together. The native call only needs a pointer to int16 samples,
+    so the returned function hands it the ring's own memory. Anything that isn't
+    such a wrapper gets its plain `process` back, and a failed native call is
+    repeated through it so it raises the wrapper's usual error.
+    """
+    native = getattr(detector, "_process_func", None) or getattr(detector, "process_func", None)
+    argtypes = getattr(native, "argtypes", None)
+    if not argtypes or len(argtypes) != 3 or argtypes[1] is not ctypes.POINTER(ctypes.c_short):
+        return detector.process
+    c_frame = ctypes.c_short * detector.frame_length
+    result = argtypes[2]._type_()
+    success = detector.PicovoiceStatuses.SUCCESS
+    handle = detector._handle
+
+    def process(frame: memoryview):
+        if native(handle, c_frame.from_buffer(frame), ctypes.byref(result)) is not success:
+            return detector.process(frame)
+        return result.value
+    return process
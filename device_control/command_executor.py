@@ -1,28 +1,91 @@
+import asyncio
+import contextlib
+import importlib
 import json
-from utils.skills import adb_skills, assistant_skills, information_skills, api_skills
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass
+from utils.adb_session import device_lock
+from utils.executor import run_blocking
+from utils.loop_monitor import track_skill
+from utils.tracing import span
+
+_SKILLS = "utils.skills."
+
+class LazySkillRegistry(Mapping):
+    """
+    Maps skill names to their functions, importing each skill module on first use.
+
+    Skill modules may hold heavy resources (EasyOCR weights, vision clients), so
+    nothing is imported until a skill from that module is actually called. A
+    module can expose a `warm_up()` function to build those resources ahead of
+    time; see `warm_up_skills`.
+    """
+
+    def __init__(self, skills: dict[str, str]):
+        self._targets = {name: target.rsplit(":", 1) for name, target in skills.items()}
+        self._resolved = {}
+
+    def __getitem__(self, skill_name):
+        if skill_name not in self._resolved:
+            module_name, attr = self._targets[skill_name]
+            module = importlib.import_module(module_name)
+            self._resolved[skill_name] = getattr(module, attr)
+        return self._resolved[skill_name]
+
+    def __contains__(self, skill_name):
+        return skill_name in self._targets
+
+    def __iter__(self):
+        return iter(self._targets)
+
+    def __len__(self):
+        return len(self._targets)
+
+    def loaded(self, skill_name):
+        """Returns the skill function if its module is already imported, else None."""
+        return self._resolved.get(skill_name)
+
+    def module_names(self) -> list[str]:
+        return sorted({module_name for module_name, _ in self._targets.values()})
 
 # The complete and correct Skill Registry
-SKILL_REGISTRY = {
+SKILL_REGISTRY = LazySkillRegistry({
     # Information Gathering
-    "silent_web_search": information_skills.silent_web_search,
-    "visible_web_search": adb_skills.visible_web_search,
-    "analyze_screen": information_skills.analyze_screen,
-    "battery_stats": information_skills.battery_stats, "get_brightness": information_skills.get_brightness,
+    "silent_web_search": _SKILLS + "information_skills:silent_web_search",
+    "visible_web_search": _SKILLS + "adb_skills:visible_web_search",
+    "analyze_screen": _SKILLS + "information_skills:analyze_screen",
+    "battery_stats": _SKILLS + "information_skills:battery_stats", "get_brightness": _SKILLS + "information_skills:get_brightness",
     # API Placeholders
-    "acc_click": api_skills.acc_click, "acc_type": api_skills.acc_type, "press_back": api_skills.press_back,
-    "press_home": api_skills.press_home, "open_notifications": api_skills.open_notifications,
-    "lock_device": api_skills.lock_device,
+    "acc_click": _SKILLS + "api_skills:acc_click", "acc_type": _SKILLS + "api_skills:acc_type", "press_back": _SKILLS + "api_skills:press_back",
+    "press_home": _SKILLS + "api_skills:press_home", "open_notifications": _SKILLS + "api_skills:open_notifications",
+    "lock_device": _SKILLS + "api_skills:lock_device",
     # Direct Device Skills
-    "take_screenshot": adb_skills.take_screenshot, "create_folder": adb_skills.create_folder,
-    "move_file": adb_skills.move_file, "type_text": adb_skills.type_text,
-    "send_keyevent": adb_skills.send_keyevent, "force_stop_app": adb_skills.force_stop_app,
-    "clear_app_data": adb_skills.clear_app_data, "set_brightness": adb_skills.set_brightness,
-    "reboot_device": adb_skills.reboot_device,
+    "take_screenshot": _SKILLS + "adb_skills:take_screenshot", "create_folder": _SKILLS + "adb_skills:create_folder",
+    "move_file": _SKILLS + "adb_skills:move_file", "type_text": _SKILLS + "adb_skills:type_text",
+    "send_keyevent": _SKILLS + "adb_skills:send_keyevent", "force_stop_app": _SKILLS + "adb_skills:force_stop_app",
+    "clear_app_data": _SKILLS + "adb_skills:clear_app_data", "set_brightness": _SKILLS + "adb_skills:set_brightness",
+    "reboot_device": _SKILLS + "adb_skills:reboot_device",
     # Internal Assistant Skills
-    "open_app": assistant_skills.open_app, "save_fact_to_memory": assistant_skills.save_fact_to_memory,
-    "wait": assistant_skills.wait, "wait_for_text": assistant_skills.wait_for_text,
-    "class_mode_on": assistant_skills.class_mode_on, "class_mode_off": assistant_skills.class_mode_off,
-}
+    "open_app": _SKILLS + "assistant_skills:open_app", "save_fact_to_memory": _SKILLS + "assistant_skills:save_fact_to_memory",
+    "wait": _SKILLS + "assistant_skills:wait", "wait_for_text": _SKILLS + "assistant_skills:wait_for_text",
+    "class_mode_on": _SKILLS + "assistant_skills:class_mode_on", "class_mode_off": _SKILLS + "assistant_skills:class_mode_off",
+})
+
+def _warm_up_sync():
+    for module_name in SKILL_REGISTRY.module_names():
+        module = importlib.import_module(module_name)
+        if hasattr(module, "warm_up"):
+            module.warm_up()
+
+async def warm_up_skills():
+    """Imports every skill module and builds its heavy resources in a background thread."""
+    print("🔥 Warming up skill modules in the background...")
+    try:
+        await run_blocking(_warm_up_sync)
+        print("✅ Skill modules warmed up.")
+    except Exception as e:
+        print(f"⚠️ Skill warm-up failed: {e}")
 
 async def execute_tool_call(tool_call):
     """Executes a single tool call from the AI with robust argument handling."""
@@ -38,12 +101,18 @@ async def execute_tool_call(tool_call):
             args = {}
 
     if skill_name in SKILL_REGISTRY:
-        skill_function = SKILL_REGISTRY[skill_name]
         print(f"▶️ Calling Skill: {skill_name} with args: {args}")
         try:
+            skill_function = SKILL_REGISTRY.loaded(skill_name)
+            if skill_function is None:
+                # The first call to a skill imports its module (in a thread, so the loop stays free).
+                skill_function = await run_blocking(SKILL_REGISTRY.__getitem__, skill_name)
             # This is the definitive fix for all argument-related TypeErrors.
             # It correctly calls the function whether args is empty or populated.
-            result = await skill_function(**args)
+            # track_skill lets the loop-lag monitor name skills that block the loop.
+            with span("tool", skill=skill_name) as tool_span, track_skill(skill_name):
+                result = await skill_function(**args)
+                tool_span.set(outcome="failed" if is_failure(result) else "ok")
             return result
         except Exception as e:
             print(f"❌ Error executing skill '{skill_name}': {e}")
@@ -51,3 +120,203 @@ async def execute_tool_call(tool_call):
     else:
         print(f"❓ Unknown skill called by AI: '{skill_name}'")
         return f"Unknown skill '{skill_name}'."
+
+
+# --- Tool Scheduling ---
+READ_ONLY = "read"          # Doesn't change the device; runs in parallel with other reads.
+MUTATING = "mutate"         # Changes device state; serialized per device, in call order.
+UI_SEQUENTIAL = "ui"        # Drives or observes the foreground UI; also stops at the first failure.
+LOCAL_WRITE = "local"       # Writes local state (memory); serialized in call order, never holds the device lock.
+
+SKILL_KINDS = {
+    "silent_web_search": READ_ONLY, "battery_stats": READ_ONLY, "get_brightness": READ_ONLY,
+    "save_fact_to_memory": LOCAL_WRITE,
+    "set_brightness": MUTATING, "create_folder": MUTATING, "move_file": MUTATING,
+    "force_stop_app": MUTATING, "clear_app_data": MUTATING, "reboot_device": MUTATING,
+    "class_mode_on": MUTATING, "class_mode_off": MUTATING, "take_screenshot": MUTATING,
+    "open_app": UI_SEQUENTIAL, "visible_web_search": UI_SEQUENTIAL, "acc_click": UI_SEQUENTIAL,
+    "acc_type": UI_SEQUENTIAL, "type_text": UI_SEQUENTIAL, "send_keyevent": UI_SEQUENTIAL,
+    "press_back": UI_SEQUENTIAL, "press_home": UI_SEQUENTIAL, "open_notifications": UI_SEQUENTIAL,
+    "lock_device": UI_SEQUENTIAL, "wait": UI_SEQUENTIAL, "wait_for_text": UI_SEQUENTIAL,
+    "analyze_screen": UI_SEQUENTIAL,
+}
+DEFAULT_SKILL_TIMEOUT = 30.0
+SKILL_TIMEOUTS = {"silent_web_search": 20.0, "analyze_screen": 60.0, "reboot_device": 60.0,
+                  "wait_for_text": 25.0, "battery_stats": 10.0, "get_brightness": 10.0}
+# Ordered in the UI chain like any UI call, but these mostly wait (sleeps, OCR polling, the
+# vision model), so they take the device lock themselves, only around their screen captures.
+SELF_LOCKING_SKILLS = {"wait", "wait_for_text", "analyze_screen"}
+# Reads that never touch the device, so they needn't wait for earlier device calls.
+OFF_DEVICE_READS = {"silent_web_search"}
+
+# Local writes from concurrent requests queue here instead of behind the device.
+_local_write_lock = None
+
+def _local_lock() -> asyncio.Lock:
+    global _local_write_lock
+    if _local_write_lock is None:
+        _local_write_lock = asyncio.Lock()
+    return _local_write_lock
+
+def _lock_for(step) -> contextlib.AbstractAsyncContextManager:
+    if step.kind == READ_ONLY or step.skill_name in SELF_LOCKING_SKILLS:
+        return contextlib.nullcontext()
+    return _local_lock() if step.kind == LOCAL_WRITE else device_lock()
+
+def _skill_timeout(skill_name: str, args: dict) -> float:
+    if skill_name == "wait":
+        try:
+            return float(args.get("seconds", 0)) + 5
+        except (TypeError, ValueError):
+            pass
+    return SKILL_TIMEOUTS.get(skill_name, DEFAULT_SKILL_TIMEOUT)
+
+def is_failure(result) -> bool:
+    """True for the error strings skills (and failed adb commands) return; placeholder skills legitimately return None."""
+    return isinstance(result, str) and (result.startswith(("Error", "Unknown skill", "Skipped"))
+                                        or result.endswith("not found.") or "' not found" in result)
+
+@dataclass
+class _Step:
+    index: int
+    skill_name: str
+    kind: str
+    started: float = None
+    finished: float = None
+    status: str = "pending"
+    duplicate_of: int = None
+
+
+class ScheduledTurn:
+    """
+    Runs one LLM round's tool calls according to what each skill does:
+      - read-only calls run in parallel with each other; a device read still
+        waits for the device calls queued before it, so it sees their effect;
+      - mutating and UI calls run one at a time, in call order, under the
+        device lock (which also keeps concurrent requests from interleaving),
+        after any device reads queued before them;
+        waiting skills hold the lock only around their own device commands;
+      - local writes (memory) run one at a time, in call order, under their
+        own lock, alongside the device chain;
+      - once a UI call fails, the remaining UI calls are skipped, so nothing
+        gets typed into the wrong app.
+    Identical calls in the same round run once and share their result when
+    nothing on the device changed in between (UI calls never do; pressing back
+    twice means twice). Every call has a timeout, and `report()` prints the
+    round's timeline.
+    """
+
+    def __init__(self, tool_calls):
+        self.tool_calls = list(tool_calls)
+        self.steps = []
+        self.tasks = []
+        self._started = time.perf_counter()
+        self._ui_chain_failed = False
+        first_by_key = {}
+        last_device = None    # The last mutating/UI task queued, which later device calls wait for
+        device_reads = []     # Device reads queued since then, which the next device call waits for
+        last_local = None
+        device_steps = 0      # Part of the dedupe key, so calls either side of a device change never merge
+        for index, tool_call in enumerate(self.tool_calls):
+            skill_name = tool_call.function.name
+            kind = SKILL_KINDS.get(skill_name, MUTATING) # Unknown skills are treated conservatively.
+            step = _Step(index, skill_name, kind)
+            self.steps.append(step)
+            on_device = kind in (MUTATING, UI_SEQUENTIAL)
+            device_read = kind == READ_ONLY and skill_name not in OFF_DEVICE_READS
+            key = (skill_name, _canonical_arguments(tool_call.function.arguments),
+                   device_steps if device_read or on_device else None)
+            if kind != UI_SEQUENTIAL and key in first_by_key:
+                step.duplicate_of = first_by_key[key]
+                task = asyncio.create_task(self._share(step, self.tasks[step.duplicate_of]))
+            else:
+                if on_device:
+                    after = device_reads + ([last_device] if last_device else [])
+                elif kind == LOCAL_WRITE:
+                    after = [last_local] if last_local else []
+                else:
+                    after = [last_device] if device_read and last_device else []
+                task = asyncio.create_task(self._run(step, tool_call, after))
+                if kind != UI_SEQUENTIAL:
+                    first_by_key[key] = index
+                if on_device:
+                    last_device, device_reads = task, []
+                    device_steps += 1
+                    if kind == MUTATING:
+                        # Repeating the mutation right away changes nothing, so it may share this result.
+                        first_by_key[key[:2] + (device_steps,)] = index
+                elif kind == LOCAL_WRITE:
+                    last_local = task
+                elif device_read:
+                    device_reads.append(task)
+            self.tasks.append(task)
+
+    async def _run(self, step, tool_call, after: list):
+        if after:
+            await asyncio.wait(after)
+        if step.kind == UI_SEQUENTIAL and self._ui_chain_failed:
+            step.status = "skipped"
+            return f"Skipped: an earlier step in this UI sequence failed, so '{step.skill_name}' was not run."
+        async with _lock_for(step):
+            step.started = time.perf_counter()
+            timeout = _skill_timeout(step.skill_name, _parse_arguments(tool_call.function.arguments))
+            try:
+                result = await asyncio.wait_for(execute_tool_call(tool_call), timeout)
+                step.status = "failed" if is_failure(result) else "ok"
+            except asyncio.TimeoutError:
+                print(f"⏱️ Skill '{step.skill_name}' timed out after {timeout:.0f}s.")
+                result = f"Error: '{step.skill_name}' timed out after {timeout:.0f} seconds."
+                step.status = "timeout"
+            step.finished = time.perf_counter()
+        if step.kind == UI_SEQUENTIAL and step.status != "ok":
+            self._ui_chain_failed = True
+        return result
+
+    async def _share(self, step, original):
+        step.started = time.perf_counter()
+        result = await original
+        step.finished = time.perf_counter()
+        step.status = "deduped"
+        return result
+
+    async def results(self) -> list:
+        """Waits for every call and returns the results in call order."""
+        results = await asyncio.gather(*self.tasks)
+        self.report()
+        return results
+
+    async def as_completed(self):
+        """Yields (index, result) as each call finishes, then prints the timeline."""
+        async def _indexed(index, task):
+            return index, await task
+        for next_result in asyncio.as_completed([_indexed(i, t) for i, t in enumerate(self.tasks)]):
+            yield await next_result
+        self.report()
+
+    def report(self):
+        total = time.perf_counter() - self._started
+        lines = [f"🗓️ Tool timeline ({len(self.steps)} call(s), {total * 1000:.0f} ms):"]
+        for step in self.steps:
+            if step.started is None:
+                lines.append(f"   {'':>17}  {step.skill_name} [{step.kind}] {step.status}")
+                continue
+            offset = (step.started - self._started) * 1000
+            duration = (step.finished - step.started) * 1000
+            note = f" (same as #{step.duplicate_of + 1})" if step.duplicate_of is not None else ""
+            lines.append(f"   +{offset:>6.0f} ms {duration:>6.0f} ms  {step.skill_name} [{step.kind}] {step.status}{note}")
+        print("\n".join(lines))
+
+
+def _parse_arguments(arguments: str) -> dict:
+    try:
+        parsed = json.loads(arguments) if arguments and arguments.strip() else {}
+    except json.JSONDecodeError:
+        return {}
+    return parsed if isinstance(parsed, dict) else {}
+
+def _canonical_arguments(arguments: str) -> str:
+    return json.dumps(_parse_arguments(arguments), sort_keys=True)
+
+async def run_tool_calls(tool_calls) -> list:
+    """Runs a round of tool calls with the scheduler and returns the results in call order."""
+    return await ScheduledTurn(tool_calls).results()
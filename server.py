@@ -1,38 +1,100 @@
 import asyncio
 import json
-import shutil
-from fastapi import FastAPI, UploadFile, File
+import time
+from dotenv import dotenv_values
+from fastapi import FastAPI, UploadFile, File, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 
 # Import all our Jarvis components
-from utils.stt_processor import transcribe_audio
-from brain.orchestrator import get_ai_response
-from device_control.command_executor import execute_tool_call
-from core.audio_manager_tts_only import speak
-from utils.app_manager import sync_app_list
+from utils.stt_processor import transcribe_audio_bytes
+from brain.orchestrator import get_ai_response, stream_ai_response
+from brain.intent_router import IntentRouter
+from device_control.command_executor import ScheduledTurn, run_tool_calls, warm_up_skills
+from utils.app_manager import start_app_sync
+from utils.adb_session import close_all_sessions
+from utils.executor import run_blocking, shutdown_executor
+from utils.loop_monitor import start_loop_monitor
+from utils.tracing import TRACE_DIR, record_span, render_metrics, span, trace_request
+from utils.web_searcher import close_http_client
+
+# --- Configuration ---
+config = dotenv_values(".env")
+# Skills load lazily on first use; set WarmUpSkills=true to preload them (e.g. OCR) after startup.
+WARM_UP_SKILLS = config.get("WarmUpSkills", "false").lower() == "true"
 
 # Create the FastAPI app
 app = FastAPI()
 
+class _ArrivalTime:
+    """Stamps when a request arrived, so the upload (body receive and parse) can be timed."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            scope.setdefault("state", {})["received_at"] = time.perf_counter()
+        await self.app(scope, receive, send)
+
+app.add_middleware(_ArrivalTime)
+# Common device commands are answered locally without an LLM round trip.
+intent_router = IntentRouter()
+
+# --- Tracing ---
+async def _read_upload(request: Request, audio: UploadFile) -> tuple[bytes, float, float]:
+    """Reads the uploaded audio; returns it with the request's arrival time and when the read finished."""
+    received_at = getattr(request.state, "received_at", None) or time.perf_counter()
+    audio_bytes = await audio.read()
+    return audio_bytes, received_at, time.perf_counter()
+
+async def _publish_trace(request_trace, include: bool) -> dict | None:
+    """Writes the trace to TraceDir (if set) and returns it when the client asked for it."""
+    if TRACE_DIR:
+        await run_blocking(request_trace.dump, TRACE_DIR)
+    return request_trace.to_dict() if include else None
+
+@app.get('/metrics')
+async def metrics():
+    """Stage latency histograms and counters in the Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 # --- The Main Agentic Loop as an API Endpoint ---
 @app.post('/api/jarvis')
-async def handle_jarvis_request(audio: UploadFile = File(...)):
+async def handle_jarvis_request(request: Request, audio: UploadFile = File(...), trace: bool = False):
     """
     This is the main endpoint for the Jarvis assistant.
     It receives an audio file, processes it, and returns the final plan.
+    With ?trace=true the response also carries the request's timing trace.
     """
-    # 1. Save the uploaded audio file
-    temp_audio_path = "Data/temp_command.wav"
-    with open(temp_audio_path, "wb") as buffer:
-        shutil.copyfileobj(audio.file, buffer)
-    
-    # 2. Transcribe the audio to text
-    user_query = transcribe_audio(temp_audio_path)
+    # 1. Read the uploaded audio into this request's own buffer (never a shared file)
+    audio_bytes, received_at, uploaded_at = await _read_upload(request, audio)
+    with trace_request("/api/jarvis", started=received_at) as request_trace:
+        record_span("upload", received_at, uploaded_at, bytes=len(audio_bytes))
+        response = await _answer(audio_bytes, request_trace)
+    if (trace_dump := await _publish_trace(request_trace, trace)) is not None:
+        response["trace"] = trace_dump
+    return response
+
+async def _answer(audio_bytes: bytes, request_trace) -> dict:
+    # 2. Transcribe the audio to text off the event loop
+    with span("stt", bytes=len(audio_bytes)):
+        user_query = await run_blocking(transcribe_audio_bytes, audio_bytes)
     if not user_query:
+        request_trace.root.set(route="no_speech")
         return {"response": "I'm sorry, I didn't catch that.", "commands": []}
         
     print(f"🎧 You said: {user_query}")
-    
-    # 3. Start the agentic loop
+
+    # 3. Try the local fast path first
+    routed = await intent_router.try_route(user_query)
+    if routed:
+        request_trace.root.set(route="fast_path")
+        print(f"🤖 Jarvis: {routed.response}")
+        return {"response": routed.response, "commands": []}
+    request_trace.root.set(route="llm")
+    turn_start = time.perf_counter()
+
+    # 4. Start the agentic loop
     messages = [{"role": "user", "content": user_query}]
     while True:
         print("🧠 Thinking...")
@@ -42,7 +104,8 @@ async def handle_jarvis_request(audio: UploadFile = File(...)):
             print(f"🛠️ AI wants to use tools: {[tc.function.name for tc in ai_response_message.tool_calls]}")
             messages.append(ai_response_message)
             
-            tool_results = await asyncio.gather(*[execute_tool_call(tc) for tc in ai_response_message.tool_calls])
+            # Reads run in parallel; device actions run in call order under the device lock.
+            tool_results = await run_tool_calls(ai_response_message.tool_calls)
             
             for i, tool_call in enumerate(ai_response_message.tool_calls):
                 messages.append({
@@ -57,6 +120,7 @@ async def handle_jarvis_request(audio: UploadFile = File(...)):
             # If the AI responds with text, this is our final answer.
             final_response_text = ai_response_message.content
             print(f"🤖 Jarvis: {final_response_text}")
+            intent_router.record_llm_turn(time.perf_counter() - turn_start)
             
             # In a real app, we would generate TTS audio and send it back.
             # For now, we'll send back the text and the final (empty) command list.
@@ -65,13 +129,138 @@ async def handle_jarvis_request(audio: UploadFile = File(...)):
                 "commands": [] # The commands were already executed on the server side
             }
 
+# --- Streaming Variant (Server-Sent Events) ---
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def _stream_events(audio_bytes: bytes, request_trace):
+    """Runs the same agentic loop as /api/jarvis, yielding (event, data) as each stage completes."""
+    start_time = time.perf_counter()
+    with span("stt", bytes=len(audio_bytes)):
+        user_query = await run_blocking(transcribe_audio_bytes, audio_bytes)
+    if not user_query:
+        request_trace.root.set(route="no_speech")
+        yield ("final", {"response": "I'm sorry, I didn't catch that.", "commands": []})
+        return
+
+    print(f"🎧 You said: {user_query}")
+    yield ("transcription", {"text": user_query})
+
+    routed = await intent_router.try_route(user_query)
+    if routed:
+        request_trace.root.set(route="fast_path")
+        tool_call = routed.tool_call
+        yield ("tool_call", {"id": tool_call.id, "name": tool_call.function.name,
+                             "arguments": tool_call.function.arguments})
+        yield ("tool_result", {"id": tool_call.id, "name": tool_call.function.name,
+                               "result": str(routed.result)})
+        print(f"🤖 Jarvis: {routed.response}")
+        yield ("final", {
+            "response": routed.response,
+            "commands": [],
+            "transcription": user_query,
+            "tool_calls": 1,
+            "elapsed_seconds": round(time.perf_counter() - start_time, 3),
+        })
+        return
+
+    request_trace.root.set(route="llm")
+    messages = [{"role": "user", "content": user_query}]
+    tool_call_count = 0
+    while True:
+        print("🧠 Thinking...")
+        ai_response_message = None
+        async for kind, payload in stream_ai_response(messages):
+            if kind == "token":
+                yield ("token", {"text": payload})
+            else:
+                ai_response_message = payload
+
+        if ai_response_message.tool_calls:
+            print(f"🛠️ AI wants to use tools: {[tc.function.name for tc in ai_response_message.tool_calls]}")
+            messages.append(ai_response_message)
+            for tool_call in ai_response_message.tool_calls:
+                yield ("tool_call", {"id": tool_call.id, "name": tool_call.function.name,
+                                     "arguments": tool_call.function.arguments})
+
+            # Report each result as soon as its tool finishes, but keep the history in call order.
+            tool_results = [None] * len(ai_response_message.tool_calls)
+            async for index, result in ScheduledTurn(ai_response_message.tool_calls).as_completed():
+                tool_results[index] = result
+                tool_call = ai_response_message.tool_calls[index]
+                yield ("tool_result", {"id": tool_call.id, "name": tool_call.function.name,
+                                       "result": str(result)})
+            tool_call_count += len(tool_results)
+
+            for i, tool_call in enumerate(ai_response_message.tool_calls):
+                messages.append({
+                    "role": "tool",
+                    "tool_call_id": tool_call.id,
+                    "name": tool_call.function.name,
+                    "content": str(tool_results[i]),
+                })
+            continue
+        else:
+            final_response_text = ai_response_message.content
+            print(f"🤖 Jarvis: {final_response_text}")
+            intent_router.record_llm_turn(time.perf_counter() - start_time)
+            yield ("final", {
+                "response": final_response_text,
+                "commands": [],
+                "transcription": user_query,
+                "tool_calls": tool_call_count,
+                "elapsed_seconds": round(time.perf_counter() - start_time, 3),
+            })
+            return
+
+async def _stream_agentic_loop(audio_bytes: bytes, received_at: float, uploaded_at: float, include_trace: bool):
+    """Formats the events as SSE; the final event is held back until the trace is complete."""
+    final = None
+    with trace_request("/api/jarvis/stream", started=received_at) as request_trace:
+        record_span("upload", received_at, uploaded_at, bytes=len(audio_bytes))
+        async for event, data in _stream_events(audio_bytes, request_trace):
+            if event == "final":
+                final = data
+            else:
+                yield _sse(event, data)
+    if (trace_dump := await _publish_trace(request_trace, include_trace)) is not None:
+        final["trace"] = trace_dump
+    yield _sse("final", final)
+
+@app.post('/api/jarvis/stream')
+async def handle_jarvis_stream_request(request: Request, audio: UploadFile = File(...), trace: bool = False):
+    """
+    Streaming version of /api/jarvis. Responds with Server-Sent Events:
+    transcription, tool_call, tool_result, token (LLM output as it is generated)
+    and a closing final event carrying the same payload as /api/jarvis
+    (plus the timing trace with ?trace=true).
+    """
+    audio_bytes, received_at, uploaded_at = await _read_upload(request, audio)
+
+    return StreamingResponse(
+        _stream_agentic_loop(audio_bytes, received_at, uploaded_at, trace),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.on_event("startup")
 async def startup_event():
     """This function runs once when the server starts up."""
     print("🤖 Jarvis Brain Server is starting up...")
-    print("🔄 Syncing installed app list from device...")
-    # We run this synchronously as it's a one-time startup task
-    sync_app_list()
-    print("✅ Sync complete. Server is ready.")
+    # The app sync talks to the device, so it runs in the background; requests are served meanwhile.
+    app.state.app_sync_task = start_app_sync()
+    # Reports any skill that stalls the event loop (and with it every other request).
+    start_loop_monitor()
+    print("✅ Server is ready.")
+    if WARM_UP_SKILLS:
+        app.state.warm_up_task = asyncio.create_task(warm_up_skills())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stops the app sync and closes the adb shell sessions, the search HTTP client and the blocking-work executor."""
+    app.state.app_sync_task.cancel()
+    await close_all_sessions()
+    await close_http_client()
+    shutdown_executor()
 
 # To run this server, use the command: uvicorn server:app --reload
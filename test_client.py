@@ -1,8 +1,10 @@
 import requests
 import os
+import sys
 
 # The address of our running Jarvis server
 SERVER_URL = "http://127.0.0.1:8000/api/jarvis"
+STREAM_URL = "http://127.0.0.1:8000/api/jarvis/stream"
 
 
 # The path to the sample audio file we want to send
@@ -14,7 +16,7 @@ def run_test():
     """
     if not os.path.exists(AUDIO_FILE_PATH):
         print(f"❌ Error: Audio file not found at '{AUDIO_FILE_PATH}'")
-        print("Please run the old 'core/main.py' once to generate a sample command.wav file.")
+        print("Record one with: python -c \"from core.audio_manager import listen_and_record; listen_and_record()\"")
         return
 
     try:
@@ -39,5 +41,34 @@ def run_test():
         print(f"\n❌ Error connecting to the server: {e}")
         print("Is your 'server.py' still running in the other terminal?")
 
+def run_stream_test():
+    """
+    Sends the sample audio file to the streaming endpoint and prints each
+    Server-Sent Event as it arrives.
+    """
+    if not os.path.exists(AUDIO_FILE_PATH):
+        print(f"❌ Error: Audio file not found at '{AUDIO_FILE_PATH}'")
+        return
+
+    try:
+        print(f"📡 Streaming audio from '{AUDIO_FILE_PATH}' to the Jarvis server...")
+        with open(AUDIO_FILE_PATH, 'rb') as audio_file:
+            files = {'audio': (os.path.basename(AUDIO_FILE_PATH), audio_file, 'audio/wav')}
+            with requests.post(STREAM_URL, files=files, stream=True) as response:
+                response.raise_for_status()
+                event = None
+                for line in response.iter_lines(decode_unicode=True):
+                    if line.startswith("event: "):
+                        event = line[len("event: "):]
+                    elif line.startswith("data: "):
+                        print(f"[{event}] {line[len('data: '):]}")
+
+    except requests.exceptions.RequestException as e:
+        print(f"\n❌ Error connecting to the server: {e}")
+
 if __name__ == "__main__":
-    run_test()
+    # Pass --stream to exercise the Server-Sent Events endpoint instead.
+    if "--stream" in sys.argv:
+        run_stream_test()
+    else:
+        run_test()
@@ -0,0 +1,311 @@
+import asyncio
+import itertools
+import os
+import secrets
+import signal
+import subprocess
+import time
+from dataclasses import dataclass
+from dotenv import dotenv_values
+
+from utils.tracing import record_adb_command
+
+# --- Configuration ---
+config = dotenv_values(".env")
+# Optional device serial; when unset adb picks the only connected device (or $ANDROID_SERIAL).
+ADB_SERIAL = config.get("AdbSerial")
+DEFAULT_TIMEOUT = 15.0
+# dumpsys / package listings can be large, so raise asyncio's 64 KiB line limit.
+_STREAM_LIMIT = 16 * 1024 * 1024
+
+
+@dataclass
+class ShellResult:
+    """The framed result of one command run inside a persistent shell."""
+    command: str
+    stdout: str
+    stderr: str
+    exit_code: int | None  # None when the command timed out or the session dropped
+    duration: float
+
+    @property
+    def ok(self) -> bool:
+        return self.exit_code == 0
+
+
+class AdbShellSession:
+    """
+    A long-lived `adb shell` process for one device.
+
+    Every command is written to the shell's stdin wrapped in a frame that prints
+    a unique end marker (with the command's exit status) on stdout and a second
+    marker on stderr, so many commands can share one process and one handshake.
+    If the device drops or a command times out, the process is killed and the
+    next call transparently starts a fresh one. Queued commands are written in
+    one go and their frames read back in order, so a batch costs one round trip.
+    """
+
+    def __init__(self, serial: str | None = None):
+        self.serial = serial
+        self._process = None
+        self._loop = None
+        self._lock = None
+        self._pending = []      # (command, timeout, future) waiting for the next write
+        self._flusher = None
+        self._token = secrets.token_hex(4)
+        self._ids = itertools.count()
+        # Legacy (pre shell-v2) adb merges stderr into stdout.
+        self._merged_stderr = False
+
+    # --- Process management ---
+    def _adb_args(self) -> list[str]:
+        args = ["adb"]
+        if self.serial:
+            args += ["-s", self.serial]
+        return args + ["shell"]
+
+    def _is_alive(self) -> bool:
+        return self._process is not None and self._process.returncode is None
+
+    async def _start(self):
+        print(f"🔌 Opening persistent adb shell{f' to {self.serial}' if self.serial else ''}...")
+        self._process = await asyncio.create_subprocess_exec(
+            *self._adb_args(),
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            limit=_STREAM_LIMIT)
+        self._merged_stderr = False
+
+    async def _reset(self):
+        """Kills the current shell so the next command reconnects."""
+        process, self._process = self._process, None
+        if process is not None and process.returncode is None:
+            try:
+                process.kill()
+                await asyncio.wait_for(process.wait(), 1)
+            except (ProcessLookupError, asyncio.TimeoutError):
+                pass
+
+    @staticmethod
+    def _kill_orphan(process):
+        """Kills a shell started on a previous event loop, which can no longer be awaited."""
+        if process is None or process.returncode is not None:
+            return
+        try:
+            os.kill(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def _bind_loop(self):
+        # asyncio subprocess transports and locks belong to one event loop.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            self._kill_orphan(self._process)
+            self._process = None
+            self._pending = []
+            self._flusher = None
+
+    # --- Framing ---
+    def _frame(self, command: str) -> tuple[bytes, bytes, bytes]:
+        marker = f"__JARVIS_{self._token}_{next(self._ids)}__"
+        out_marker, err_marker = f"{marker}O", f"{marker}E"
+        # The braces group the command so it cannot read our stdin; the exit code
+        # is captured before the markers are printed.
+        script = (
+            f"{{ {command}\n}} </dev/null\n"
+            f"__jarvis_rc=$?\n"
+            f"printf '\\n{err_marker}\\n' >&2\n"
+            f"printf '\\n{out_marker} %d\\n' $__jarvis_rc\n"
+        )
+        return script.encode(), out_marker.encode(), err_marker.encode()
+
+    async def _read_frame(self, out_marker: bytes, err_marker: bytes):
+        stdout_reader = self._process.stdout
+        stderr_reader = self._process.stderr
+        stderr_task = None
+        if not self._merged_stderr:
+            stderr_task = asyncio.ensure_future(stderr_reader.readuntil(b"\n" + err_marker + b"\n"))
+        try:
+            raw_out = await stdout_reader.readuntil(b"\n" + out_marker + b" ")
+            exit_code = int((await stdout_reader.readline()).strip() or -1)
+            raw_out = raw_out[:-len(out_marker) - 2]
+
+            merged_tail = b"\n" + err_marker + b"\n"
+            if merged_tail in raw_out:
+                # The shell has no separate stderr channel; stderr text is interleaved in stdout.
+                self._merged_stderr = True
+                raw_out = raw_out.replace(merged_tail, b"\n")
+                raw_err = b""
+            elif stderr_task is not None:
+                raw_err = (await stderr_task)[:-len(err_marker) - 2]
+            else:
+                raw_err = b""
+        finally:
+            if stderr_task is not None:
+                if stderr_task.done():
+                    stderr_task.exception()  # Mark a failed read as retrieved.
+                else:
+                    stderr_task.cancel()
+        return raw_out, raw_err, exit_code
+
+    async def _run_batch(self, commands: list[str], timeouts: list[float]) -> list[ShellResult]:
+        """
+        Writes every command's frame to the shell in a single write, then reads the
+        frames back in order. Each command gets its own timeout, counted from the
+        end of the previous one. Must be called with the session lock held.
+        """
+        start = time.perf_counter()
+        for attempt in range(2):
+            if not self._is_alive():
+                await self._start()
+            frames = [self._frame(command) for command in commands]
+            try:
+                self._process.stdin.write(b"".join(script for script, _, _ in frames))
+                await self._process.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                # Nothing reached the device yet, so it is safe to reconnect and retry once.
+                await self._reset()
+                continue
+            results = []
+            previous = start
+            for index, (command, (_, out_marker, err_marker)) in enumerate(zip(commands, frames)):
+                try:
+                    raw_out, raw_err, exit_code = await asyncio.wait_for(
+                        self._read_frame(out_marker, err_marker), timeouts[index])
+                except asyncio.TimeoutError:
+                    duration = time.perf_counter() - previous  # Before the reset, which can take a while.
+                    await self._reset()
+                    results.append(ShellResult(command, "", f"Timed out after {timeouts[index]}s", None, duration))
+                    return results + self._outcome_unknown(commands[index + 1:], "an earlier command timed out")
+                except (asyncio.IncompleteReadError, ConnectionResetError) as e:
+                    # The shell exited mid-command (device unplugged, adb server restarted, ...).
+                    duration = time.perf_counter() - previous
+                    partial_err = b""
+                    if self._process is not None and self._process.stderr is not None:
+                        try:
+                            partial_err = await asyncio.wait_for(self._process.stderr.read(), 1)
+                        except Exception:
+                            pass
+                    await self._reset()
+                    message = partial_err.decode(errors="replace").strip() or f"adb shell disconnected: {e}"
+                    results.append(ShellResult(command, "", message, None, duration))
+                    return results + self._outcome_unknown(commands[index + 1:], "the adb shell disconnected")
+                now = time.perf_counter()
+                results.append(ShellResult(
+                    command,
+                    raw_out.decode(errors="replace").strip(),
+                    raw_err.decode(errors="replace").strip(),
+                    exit_code,
+                    now - previous))
+                previous = now
+            return results
+        return self._not_run(commands, "could not open an adb shell session")
+
+    @staticmethod
+    def _not_run(commands: list[str], reason: str) -> list[ShellResult]:
+        return [ShellResult(command, "", f"Not run: {reason}.", None, 0.0) for command in commands]
+
+    @staticmethod
+    def _outcome_unknown(commands: list[str], reason: str) -> list[ShellResult]:
+        # These frames were already written to the shell, so they may have run on the device.
+        return [ShellResult(command, "", f"Outcome unknown: {reason} before its result was read; "
+                                         f"it may have run.", None, 0.0) for command in commands]
+
+    async def _flush(self):
+        """Sends everything queued so far as one batch; commands queued meanwhile go in the next."""
+        async with self._lock:
+            while self._pending:
+                batch, self._pending = self._pending, []
+                # A caller that gave up before its turn came doesn't get its command run.
+                batch = [entry for entry in batch if not entry[2].cancelled()]
+                if not batch:
+                    continue
+                try:
+                    results = await self._run_batch([c for c, _, _ in batch], [t for _, t, _ in batch])
+                except Exception as e:
+                    await self._reset()
+                    for _, _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                for (_, _, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+
+    def _enqueue(self, command: str, timeout: float) -> asyncio.Future:
+        self._bind_loop()
+        future = self._loop.create_future()
+        self._pending.append((command, timeout, future))
+        if self._flusher is None or self._flusher.done():
+            self._flusher = self._loop.create_task(self._flush())
+        return future
+
+    # --- Public API ---
+    async def run(self, command: str, timeout: float = DEFAULT_TIMEOUT) -> ShellResult:
+        """
+        Runs a single shell command on the device and returns its framed result.
+        Commands issued concurrently (parallel tool calls, concurrent requests)
+        are pipelined into one write automatically.
+        """
+        result = await self._enqueue(command, timeout)
+        if result.exit_code is not None:
+            record_adb_command(result.duration)
+        return result
+
+    async def run_batch(self, commands: list[str], timeout: float = DEFAULT_TIMEOUT) -> list[ShellResult]:
+        """
+        Runs independent commands in one round trip and returns one result per
+        command, in order. A failing command doesn't stop the ones after it; a
+        timeout or a dropped connection stops reading, and the commands after it
+        are reported with an unknown outcome (exit code None), since they were
+        already sent and may have run.
+        """
+        futures = [self._enqueue(command, timeout) for command in commands]
+        results = list(await asyncio.gather(*futures))
+        for result in results:
+            if result.exit_code is not None:
+                record_adb_command(result.duration)
+        return results
+
+    async def close(self):
+        if self._lock is None:
+            return
+        async with self._lock:
+            await self._reset()
+
+
+# --- Session Registry ---
+_sessions: dict[str | None, AdbShellSession] = {}
+
+def get_session(serial: str | None = None) -> AdbShellSession:
+    """Returns the shared persistent shell session for a device (default device if no serial)."""
+    serial = serial or ADB_SERIAL
+    if serial not in _sessions:
+        _sessions[serial] = AdbShellSession(serial)
+    return _sessions[serial]
+
+async def run_shell(command: str, timeout: float = DEFAULT_TIMEOUT, serial: str | None = None) -> ShellResult:
+    """Convenience wrapper: runs a command on the default (or given) device's shared session."""
+    return await get_session(serial).run(command, timeout=timeout)
+
+async def run_shell_batch(commands: list[str], timeout: float = DEFAULT_TIMEOUT,
+                          serial: str | None = None) -> list[ShellResult]:
+    """Runs independent commands on the default (or given) device in a single round trip."""
+    return await get_session(serial).run_batch(commands, timeout=timeout)
+
+async def close_all_sessions():
+    for session in list(_sessions.values()):
+        await session.close()
+
+
+# --- Device Locks ---
+# One lock per device, shared by every turn and every concurrent server request.
+_device_locks: dict[str | None, asyncio.Lock] = {}
+
+def device_lock(serial: str | None = None) -> asyncio.Lock:
+    """The lock that keeps tool calls driving the same device from interleaving."""
+    serial = serial or ADB_SERIAL
+    if serial not in _device_locks:
+        _device_locks[serial] = asyncio.Lock()
+    return _device_locks[serial]
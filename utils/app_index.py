@@ -0,0 +1,184 @@
+import json
+import re
+import threading
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+
+APP_LIST_PATH = "Data/app_packages.json"
+APP_ALIASES_PATH = "Data/app_aliases.json"
+
+# Package segments that never name an app on their own.
+_GENERIC_SEGMENTS = {
+    "com", "org", "net", "in", "io", "co", "app", "apps", "android", "google", "mobile", "client",
+    "main", "lite", "free", "pro", "phone", "launcher", "activity", "ui", "ai",
+}
+# Spoken names that differ from anything in the package or label.
+_BUILTIN_ALIASES = {
+    "insta": "com.instagram.android",
+    "yt": "com.google.android.youtube",
+    "fb": "com.facebook.katana",
+    "maps": "com.google.android.apps.maps",
+    "gmail": "com.google.android.gm",
+    "play store": "com.android.vending",
+    "whatsapp business": "com.whatsapp.w4b",
+    "camera": "com.android.camera",
+}
+MIN_SCORE = 0.45
+# Memoized queries per index; least recently used are dropped past this.
+QUERY_CACHE_ENTRIES = 256
+
+
+def _key(name: str) -> str:
+    """Lowercase alphanumerics only, so 'Whats App', 'whatsapp' and 'WhatsApp!' share a key."""
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+def _trigrams(key: str) -> set[str]:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def label_from_package(package_name: str) -> str:
+    """A readable fallback label: the most specific non-generic package segment."""
+    segments = [s for s in package_name.split(".") if s.lower() not in _GENERIC_SEGMENTS]
+    return (segments[-1] if segments else package_name.split(".")[-1]).replace("_", " ")
+
+
+@dataclass
+class AppEntry:
+    label: str
+    package: str
+    aliases: list[str] = field(default_factory=list)
+
+
+@dataclass
+class AppMatch:
+    label: str
+    package: str
+    score: float
+
+
+class AppIndex:
+    """
+    Resolves spoken app names to package names.
+
+    Every label and alias is reduced to a normalized key. An exact key hit is a
+    single dict lookup; otherwise candidates are gathered from a trigram
+    inverted index and ranked by Dice similarity, so typos and STT spellings
+    ("whats up", "you tube") still resolve. Results are memoized per query in a
+    small LRU.
+    """
+
+    def __init__(self, entries: list[AppEntry]):
+        self.entries = entries
+        self._exact = {}
+        self._keys = []                      # (key, trigrams, entry index)
+        self._postings = defaultdict(set)    # trigram -> positions in self._keys
+        for index, entry in enumerate(entries):
+            for name in [entry.label, *entry.aliases]:
+                key = _key(name)
+                if not key:
+                    continue
+                # Launcher labels win over derived aliases when two apps share a key.
+                self._exact.setdefault(key, index)
+                grams = _trigrams(key)
+                for gram in grams:
+                    self._postings[gram].add(len(self._keys))
+                self._keys.append((key, grams, index))
+        self._cache: OrderedDict[tuple, list] = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def search(self, name: str, limit: int = 3) -> list[AppMatch]:
+        """Returns up to `limit` candidate apps, best first."""
+        key = _key(name)
+        if not key:
+            return []
+        with self._cache_lock:
+            cached = self._cache.get((key, limit))
+            if cached is not None:
+                self._cache.move_to_end((key, limit))
+                return cached
+        best = {}
+        if key in self._exact:
+            best[self._exact[key]] = 1.0
+        grams = _trigrams(key)
+        shared = defaultdict(int)
+        for gram in grams:
+            for position in self._postings.get(gram, ()):
+                shared[position] += 1
+        for position, overlap in shared.items():
+            candidate_key, candidate_grams, index = self._keys[position]
+            score = 2 * overlap / (len(grams) + len(candidate_grams))
+            if len(key) >= 3 and candidate_key.startswith(key):
+                # A spoken prefix of a longer label ("insta" -> "instagram").
+                score = min(1.0, score + 0.15)
+            if score > best.get(index, 0.0):
+                best[index] = score
+        ranked = sorted(best.items(), key=lambda item: -item[1])[:limit]
+        matches = [AppMatch(self.entries[i].label, self.entries[i].package, round(s, 3)) for i, s in ranked]
+        with self._cache_lock:
+            self._cache[(key, limit)] = matches
+            if len(self._cache) > QUERY_CACHE_ENTRIES:
+                self._cache.popitem(last=False)
+        return matches
+
+    def resolve(self, name: str) -> AppMatch | None:
+        """The single best match if it is confident enough to act on, else None."""
+        matches = self.search(name, limit=1)
+        return matches[0] if matches and matches[0].score >= MIN_SCORE else None
+
+    # --- Persistence ---
+    def to_json(self) -> dict:
+        return {"apps": [{"label": e.label, "package": e.package, "aliases": e.aliases} for e in self.entries]}
+
+    @classmethod
+    def from_json(cls, data: dict) -> "AppIndex":
+        if "apps" in data and isinstance(data["apps"], list):
+            entries = [AppEntry(a["label"], a["package"], list(a.get("aliases", []))) for a in data["apps"]]
+        else:
+            # Legacy format: {"short name": "package.name"}.
+            entries = [AppEntry(label_from_package(package), package, [name]) for name, package in data.items()]
+        return cls(_with_aliases(entries))
+
+
+def _with_aliases(entries: list[AppEntry]) -> list[AppEntry]:
+    """Adds the built-in and user aliases (Data/app_aliases.json) for installed packages."""
+    aliases = dict(_BUILTIN_ALIASES)
+    try:
+        with open(APP_ALIASES_PATH, "r") as f:
+            aliases.update(json.load(f))
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    by_package = {entry.package: entry for entry in entries}
+    for alias, package in aliases.items():
+        entry = by_package.get(package)
+        if entry is not None and alias not in entry.aliases:
+            entry.aliases.append(alias)
+    return entries
+
+
+# --- Shared Index ---
+_index = None
+_index_lock = threading.Lock()
+
+def load_app_index(path: str = APP_LIST_PATH) -> AppIndex:
+    try:
+        with open(path, "r") as f:
+            return AppIndex.from_json(json.load(f))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return AppIndex([])
+
+def get_app_index() -> AppIndex:
+    """Returns the process-wide app index, loading it from disk on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = load_app_index()
+    return _index
+
+def set_app_index(index: AppIndex):
+    """Swaps in a freshly synced index; lookups already in progress keep the old one."""
+    global _index
+    with _index_lock:
+        _index = index
@@ -1,42 +1,120 @@
 import subprocess
+import asyncio
 import json
 import os
+import re
+from dotenv import dotenv_values
 
-APP_LIST_PATH = "Data/app_packages.json"
+from utils.adb_session import run_shell
+from utils.executor import run_blocking
+from utils.app_index import APP_LIST_PATH, AppEntry, AppIndex, get_app_index, label_from_package, set_app_index
+
+# --- Configuration ---
+config = dotenv_values(".env")
+# Seconds between background re-syncs; 0 syncs once at startup only.
+APP_SYNC_INTERVAL = float(config.get("AppSyncInterval", 0))
+
+# Only packages with a launcher activity; overlays, providers and system modules are skipped.
+_LAUNCHER_QUERY = "cmd package query-activities -a android.intent.action.MAIN -c android.intent.category.LAUNCHER"
+_PACKAGE_LINE = re.compile(r"^\s*packageName=(\S+)", re.MULTILINE)
+_LABEL_LINE = re.compile(r"nonLocalizedLabel=(.+?)(?:\s+icon=|$)", re.MULTILINE)
+
+def _parse_launcher_apps(output: str) -> list[AppEntry]:
+    """Parses the ResolveInfo dump into one entry per launchable package."""
+    entries = {}
+    for block in re.split(r"\n\s*Activity #\d+:", output):
+        package = _PACKAGE_LINE.search(block)
+        if not package or package.group(1) in entries:
+            continue
+        package_name = package.group(1)
+        label = _LABEL_LINE.search(block)
+        label = label.group(1).strip() if label else "null"
+        derived = label_from_package(package_name)
+        if label == "null":
+            # The label is a string resource the shell can't resolve; use the package name instead.
+            label, aliases = derived, []
+        else:
+            aliases = [derived] if derived.lower() != label.lower() else []
+        entries[package_name] = AppEntry(label, package_name, aliases)
+    return list(entries.values())
+
+
+# --- Diff & Publish ---
+def _diff(old: AppIndex, new_entries: list[AppEntry]) -> tuple[list[str], list[str], list[str]]:
+    """Returns the (added, removed, updated) package names between the current index and a fresh scan."""
+    before = {e.package: e.label for e in old.entries}
+    after = {e.package: e.label for e in new_entries}
+    added = sorted(after.keys() - before.keys())
+    removed = sorted(before.keys() - after.keys())
+    updated = sorted(p for p in after.keys() & before.keys() if after[p] != before[p])
+    return added, removed, updated
+
+def _write_atomically(index: AppIndex, path: str = APP_LIST_PATH):
+    # Readers see either the old file or the new one, never a half-written one.
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(index.to_json(), f, indent=4)
+    os.replace(temp_path, path)
+
+def _apply_scan(output: str) -> bool:
+    """Publishes a scan if anything changed; returns True when the index was updated."""
+    new_entries = _parse_launcher_apps(output)
+    if not new_entries:
+        print("⚠️ The device reported no launchable apps; keeping the current app list.")
+        return False
+    added, removed, updated = _diff(get_app_index(), new_entries)
+    if not (added or removed or updated):
+        print(f"✅ App list is up to date ({len(new_entries)} apps).")
+        return False
+    index = AppIndex.from_json({"apps": [vars(e) for e in new_entries]})
+    _write_atomically(index)
+    set_app_index(index)
+    print(f"✅ App list synced: +{len(added)} -{len(removed)} ~{len(updated)} ({len(index)} apps).")
+    return True
+
+
+# --- Sync ---
+async def sync_app_list_async() -> bool:
+    """Scans the device over the persistent adb shell and publishes any changes."""
+    print("🔄 Syncing installed app list from device...")
+    try:
+        result = await run_shell(_LAUNCHER_QUERY, timeout=30)
+        if not result.ok:
+            print("⚠️ Could not fetch app list. Is the device connected and authorized?")
+            return False
+        # Parsing, diffing and the file write stay off the event loop.
+        return await run_blocking(_apply_scan, result.stdout)
+    except Exception as e:
+        print(f"❌ An error occurred during app sync: {e}")
+        return False
+
+async def _sync_forever(interval: float):
+    while True:
+        await sync_app_list_async()
+        if interval <= 0:
+            return
+        await asyncio.sleep(interval)
+
+def start_app_sync(interval: float = APP_SYNC_INTERVAL) -> asyncio.Task:
+    """
+    Starts the app sync as a background task and returns immediately. Until it
+    finishes, open_app serves the list saved by the previous sync.
+    """
+    return asyncio.create_task(_sync_forever(interval))
 
 def sync_app_list():
     """
-    Gets the list of user-installed apps from the connected device
-    and saves it to a JSON file.
+    Blocking one-off sync for running this file directly.
     """
     print("🔄 Syncing installed app list from device...")
     try:
-        # --- CHANGE 1: The command is updated to the one you found ---
-        command = "adb shell cmd package list packages --user 0"
-        result = subprocess.run(command, shell=True, capture_output=True, text=True)
+        result = subprocess.run(f"adb shell {_LAUNCHER_QUERY}", shell=True, capture_output=True, text=True)
 
         if result.returncode != 0:
             print("⚠️ Could not fetch app list. Is the device connected and authorized?")
             return
 
-        lines = result.stdout.strip().split('\n')
-        app_dict = {}
-
-        # --- CHANGE 2: The parsing logic is updated for the new command's output ---
-        for line in lines:
-            # New line format is: package:com.package.name
-            if line.startswith("package:"):
-                package_name = line.split(':')[-1].strip()
-                
-                # Create a simple, user-friendly name from the last part of the package name
-                app_name = package_name.split('.')[-1]
-
-                app_dict[app_name.lower()] = package_name
-
-        with open(APP_LIST_PATH, "w") as f:
-            json.dump(app_dict, f, indent=4)
-        
-        print(f"✅ App list synced successfully. Found {len(app_dict)} apps.")
+        _apply_scan(result.stdout)
 
     except Exception as e:
         print(f"❌ An error occurred during app sync: {e}")
@@ -0,0 +1,22 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import dotenv_values
+
+# --- Configuration ---
+config = dotenv_values(".env")
+# Upper bound on concurrent blocking jobs (STT, subprocesses, sync network calls) per worker process.
+BLOCKING_WORKERS = int(config.get("BlockingWorkers", 8))
+
+# --- Shared Executor ---
+# A dedicated, bounded pool so a burst of slow requests queues up here instead of
+# starving the event loop or the default executor that asyncio itself relies on.
+_blocking_executor = ThreadPoolExecutor(max_workers=BLOCKING_WORKERS, thread_name_prefix="jarvis-blocking")
+
+async def run_blocking(func, *args, **kwargs):
+    """Runs a blocking function on the shared bounded executor and awaits its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_blocking_executor, functools.partial(func, *args, **kwargs))
+
+def shutdown_executor():
+    _blocking_executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,86 @@
+import asyncio
+import contextlib
+import itertools
+import time
+from collections import Counter
+from dotenv import dotenv_values
+
+# --- Configuration ---
+config = dotenv_values(".env")
+LOOP_MONITOR = config.get("LoopMonitor", "true").lower() == "true"
+# A stall longer than this is reported, together with the skills that were running.
+LOOP_LAG_THRESHOLD_MS = float(config.get("LoopLagThresholdMs", 100))
+_TICK = 0.05
+
+# --- Skill Tracking ---
+_active = {}        # token -> (skill name, started)
+_recent = []        # (skill name, started, finished) of skills that ended recently
+_tokens = itertools.count()
+
+@contextlib.contextmanager
+def track_skill(skill_name: str):
+    """Marks a skill as running, so a loop stall can be attributed to it."""
+    token = next(_tokens)
+    _active[token] = (skill_name, time.perf_counter())
+    try:
+        yield
+    finally:
+        name, started = _active.pop(token)
+        _recent.append((name, started, time.perf_counter()))
+        if len(_recent) > 64:
+            del _recent[:32]
+
+
+class LoopLagMonitor:
+    """
+    Wakes every 50 ms and measures how late it was woken. Lateness means some
+    callback held the event loop; the skills running during that window are
+    reported as suspects and counted, so a skill that keeps blocking stands out.
+    """
+
+    def __init__(self, threshold_ms: float = LOOP_LAG_THRESHOLD_MS):
+        self.threshold_ms = threshold_ms
+        self.stalls = 0
+        self.worst_ms = 0.0
+        self.suspects = Counter()
+        self._task = None
+
+    def start(self) -> asyncio.Task:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _run(self):
+        while True:
+            window_start = time.perf_counter()
+            await asyncio.sleep(_TICK)
+            now = time.perf_counter()
+            lag_ms = (now - window_start - _TICK) * 1000
+            if lag_ms >= self.threshold_ms:
+                self._report(lag_ms, window_start)
+
+    def _report(self, lag_ms: float, window_start: float):
+        names = {name for name, _ in _active.values()}
+        names |= {name for name, _, finished in _recent if finished >= window_start}
+        self.stalls += 1
+        self.worst_ms = max(self.worst_ms, lag_ms)
+        self.suspects.update(names)
+        suspects = ", ".join(sorted(names)) or "no skill running (core loop code)"
+        print(f"🐢 Event loop blocked for {lag_ms:.0f} ms; running: {suspects}")
+
+    def stats(self) -> dict:
+        return {"stalls": self.stalls, "worst_ms": round(self.worst_ms, 1),
+                "suspects": dict(self.suspects.most_common())}
+
+
+loop_monitor = LoopLagMonitor()
+
+def start_loop_monitor():
+    """Starts the shared monitor if LoopMonitor is enabled (the default)."""
+    if LOOP_MONITOR:
+        return loop_monitor.start()
+    return None
@@ -0,0 +1,91 @@
+import hashlib
+from collections import OrderedDict
+from threading import Lock
+import numpy as np
+
+
+class IncrementalOCR:
+    """
+    Band-based incremental OCR for polling the same screen over and over.
+
+    Each frame is cut into full-width horizontal bands. Consecutive bands overlap
+    by `overlap` pixels, so any text line up to that tall lies whole inside one
+    band; size it to the tallest line you expect to match. Bands are identified
+    by a content hash and their recognised text is cached, so an unchanged band
+    is never OCR'd twice, and the search stops at the first band that contains
+    the text.
+
+    A multi-word phrase can still wrap onto two lines that land in different
+    bands. Only when the bands hold both its first and its last word is the miss
+    re-checked with one full-frame pass (also cached); a screen that simply
+    doesn't show the text yet costs no more than its changed bands.
+
+    OCR readers such as EasyOCR are not thread-safe, so calls into `ocr_fn` are
+    serialized and bands are recognised one at a time on the calling thread.
+    """
+
+    def __init__(self, ocr_fn, band_height: int = 256, overlap: int = 96, cache_size: int = 512):
+        self.ocr_fn = ocr_fn  # Takes an (H, W, C) array, returns a list of text lines.
+        self.band_height = band_height
+        self.overlap = overlap
+        self.cache_size = cache_size
+        self._cache: OrderedDict[bytes, str] = OrderedDict()
+        self._cache_lock = Lock()
+        self._ocr_lock = Lock()
+        self.stats = {"frames": 0, "bands_ocred": 0, "bands_cached": 0, "full_frames_ocred": 0,
+                      "full_frames_cached": 0}
+
+    def _bands(self, frame: np.ndarray):
+        height = frame.shape[0]
+        step = self.band_height - self.overlap
+        for top in range(0, max(height - self.overlap, 1), step):
+            yield frame[top:top + self.band_height]
+
+    @staticmethod
+    def _hash(band: np.ndarray) -> bytes:
+        # Whole-row slices of a C-contiguous frame are contiguous, so this hashes without copying.
+        data = band.data if band.flags.c_contiguous else np.ascontiguousarray(band).data
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    def _count(self, stat: str, amount: int = 1):
+        with self._cache_lock:
+            self.stats[stat] += amount
+
+    def _cached_text(self, key: bytes) -> str | None:
+        with self._cache_lock:
+            text = self._cache.get(key)
+            if text is not None:
+                self._cache.move_to_end(key)
+            return text
+
+    def _text(self, key: bytes, image: np.ndarray, kind: str) -> str:
+        """Returns the cached text for `key`, recognising `image` on a miss; `kind` names the stats."""
+        text = self._cached_text(key)
+        if text is not None:
+            self._count(f"{kind}_cached")
+            return text
+        with self._ocr_lock:
+            text = " ".join(self.ocr_fn(image)).lower()
+        with self._cache_lock:
+            self.stats[f"{kind}_ocred"] += 1
+            self._cache[key] = text
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return text
+
+    def find_text(self, frame: np.ndarray, text_to_find: str) -> bool:
+        """Returns True as soon as a band (or, for a phrase split across bands, the whole frame) contains the text."""
+        needle = text_to_find.lower()
+        words = needle.split()
+        self._count("frames")
+        seen_first = seen_last = False
+        for band in self._bands(frame):
+            text = self._text(self._hash(band), band, "bands")
+            if needle in text:
+                return True
+            if len(words) > 1:
+                seen_first = seen_first or words[0] in text
+                seen_last = seen_last or words[-1] in text
+        if not (seen_first and seen_last):
+            return False
+        return needle in self._text(b"full:" + self._hash(frame), frame, "full_frames")
@@ -0,0 +1,129 @@
+import asyncio
+import io
+import struct
+import subprocess
+import time
+import numpy as np
+from dotenv import dotenv_values
+from PIL import Image
+from utils.adb_session import ADB_SERIAL
+
+# --- Configuration ---
+config = dotenv_values(".env")
+# "raw" streams the uncompressed framebuffer (no PNG encode on the phone); "png" is smaller on the wire.
+CAPTURE_FORMAT = config.get("ScreenCaptureFormat", "raw").lower()
+CAPTURE_TIMEOUT = 10.0
+
+# screencap's raw header: width, height, pixel format (+ colour space on Android 9+).
+_RAW_FORMATS = {
+    1: ("RGBA", 4),  # RGBA_8888
+    2: ("RGBX", 4),  # RGBX_8888
+    3: ("RGB", 3),   # RGB_888
+}
+
+
+class ScreenFrame:
+    """
+    One captured screen, held entirely in memory.
+
+    The pixel data is the exact buffer streamed from `adb exec-out`; the NumPy
+    array and PIL image are views over it, decoded once and shared by every
+    vision and OCR consumer.
+    """
+
+    def __init__(self, data: bytes, captured_at: float):
+        self.data = data
+        self.captured_at = captured_at
+        self._array = None
+        self._image = None
+        self.is_png = data[:8] == b"\x89PNG\r\n\x1a\n"
+        if self.is_png:
+            self.width, self.height = struct.unpack(">II", data[16:24])
+            self.mode, self._offset = None, 0
+        else:
+            self.width, self.height, pixel_format = struct.unpack_from("<III", data)
+            if pixel_format not in _RAW_FORMATS:
+                raise ValueError(f"Unsupported screencap pixel format: {pixel_format}")
+            self.mode, bytes_per_pixel = _RAW_FORMATS[pixel_format]
+            # The header is 12 or 16 bytes depending on the Android version.
+            self._offset = len(data) - self.width * self.height * bytes_per_pixel
+            if self._offset not in (12, 16):
+                raise ValueError("Truncated or malformed raw screencap buffer.")
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.captured_at
+
+    def as_array(self) -> np.ndarray:
+        """Returns an (H, W, C) uint8 view of the frame; read-only and shared, do not modify."""
+        if self._array is None:
+            if self.is_png:
+                self._array = np.asarray(self.as_image())
+            else:
+                channels = 3 if self.mode == "RGB" else 4
+                self._array = np.frombuffer(self.data, dtype=np.uint8, offset=self._offset).reshape(
+                    self.height, self.width, channels)
+        return self._array
+
+    def as_image(self) -> Image.Image:
+        """Returns a PIL image; for raw frames it shares memory with the capture buffer."""
+        if self._image is None:
+            if self.is_png:
+                self._image = Image.open(io.BytesIO(self.data))
+                self._image.load()
+            else:
+                pixels = memoryview(self.data)[self._offset:]
+                self._image = Image.frombuffer(self.mode, (self.width, self.height), pixels,
+                                               "raw", self.mode, 0, 1)
+        return self._image
+
+
+# --- Capture Service ---
+_latest_frame: ScreenFrame | None = None
+_in_flight: asyncio.Future | None = None
+
+async def _exec_out_screencap(raw: bool) -> bytes:
+    args = ["adb"]
+    if ADB_SERIAL:
+        args += ["-s", ADB_SERIAL]
+    args += ["exec-out", "screencap"] + ([] if raw else ["-p"])
+    process = await asyncio.create_subprocess_exec(*args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), CAPTURE_TIMEOUT)
+    except asyncio.TimeoutError:
+        process.kill()
+        raise RuntimeError(f"screencap timed out after {CAPTURE_TIMEOUT}s")
+    if process.returncode != 0 or not stdout:
+        raise RuntimeError(f"screencap failed: {stderr.decode(errors='replace').strip()}")
+    return stdout
+
+async def capture_screen(max_age: float = 0.0, raw: bool | None = None) -> ScreenFrame:
+    """
+    Streams the device framebuffer into memory and returns it as a ScreenFrame.
+
+    A frame younger than `max_age` seconds is reused, and concurrent callers
+    share a single in-flight capture instead of each spawning their own.
+    """
+    global _latest_frame, _in_flight
+    if _latest_frame is not None and _latest_frame.age <= max_age:
+        return _latest_frame
+    if _in_flight is not None:
+        return await asyncio.shield(_in_flight)
+
+    _in_flight = asyncio.get_running_loop().create_future()
+    future = _in_flight
+    try:
+        use_raw = CAPTURE_FORMAT == "raw" if raw is None else raw
+        frame = ScreenFrame(await _exec_out_screencap(use_raw), time.monotonic())
+        _latest_frame = frame
+        future.set_result(frame)
+        return frame
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # Waiters re-raise it; don't log it as unretrieved.
+        raise
+    finally:
+        _in_flight = None
@@ -0,0 +1,154 @@
+import asyncio
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dotenv import dotenv_values
+from utils.executor import run_blocking
+from utils.tracing import SEARCH_CACHE
+
+# --- Configuration ---
+config = dotenv_values(".env")
+SEARCH_CACHE_TTL = float(config.get("SearchCacheTTL", 900))
+# Answers to these go stale within minutes, so they get a much shorter TTL.
+LIVE_QUERY_TTL = float(config.get("SearchCacheLiveTTL", 60))
+SEARCH_CACHE_ENTRIES = int(config.get("SearchCacheEntries", 512))
+# Set SearchCacheDisk=true to keep answers across restarts (Data/search_cache.db).
+SEARCH_CACHE_DISK = config.get("SearchCacheDisk", "false").lower() == "true"
+SEARCH_CACHE_PATH = "Data/search_cache.db"
+
+_LIVE_WORDS = re.compile(r"\b(?:score|live|now|today|tonight|current|currently|latest|weather|temperature|"
+                         r"price|stock|news|traffic)\b")
+_FILLER = re.compile(r"\b(?:please|sir|jarvis|hey|ok|okay|tell me|can you|could you)\b")
+
+# Only punctuation around words is dropped; symbols inside or after them ("c++", "c#", "3.5") are meaning.
+_SENTENCE_PUNCTUATION = "?!.,;:\"'()"
+
+def normalize_query(query: str) -> str:
+    """Case, sentence punctuation, politeness and spacing don't change what is being asked."""
+    words = (word.strip(_SENTENCE_PUNCTUATION) for word in query.lower().split())
+    return " ".join(_FILLER.sub(" ", " ".join(w for w in words if w)).split())
+
+# Keys of SearchCache.metrics -> the `result` label on /metrics.
+_RESULT_LABELS = {"hits": "hit", "disk_hits": "disk_hit", "misses": "miss", "coalesced": "coalesced", "errors": "error"}
+
+def _is_failure(answer) -> bool:
+    return not answer or answer.startswith(("Sorry sir", "Error"))
+
+
+class _DiskStore:
+    """A tiny SQLite table of (key, answer, expires_at); only touched from worker threads."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS search_cache "
+                           "(key TEXT PRIMARY KEY, answer TEXT NOT NULL, expires REAL NOT NULL)")
+        self._conn.commit()
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute("SELECT answer, expires FROM search_cache WHERE key = ?", (key,)).fetchone()
+        return row if row and row[1] > time.time() else None
+
+    def put(self, key: str, answer: str, expires: float):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO search_cache VALUES (?, ?, ?)", (key, answer, expires))
+
+
+class SearchCache:
+    """
+    A TTL cache in front of the web search backends.
+
+    Queries are normalized before lookup, so "Weather in Mumbai?" and "weather
+    in mumbai" share an entry. Concurrent identical lookups are coalesced into a
+    single backend call (singleflight). Failed searches are never cached.
+    """
+
+    def __init__(self, ttl: float = SEARCH_CACHE_TTL, live_ttl: float = LIVE_QUERY_TTL,
+                 max_entries: int = SEARCH_CACHE_ENTRIES, disk_path: str | None = None):
+        self.ttl = ttl
+        self.live_ttl = live_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key -> (answer, expires_at), least recently used first
+        self._in_flight = {}            # key -> asyncio.Task
+        self._disk = _DiskStore(disk_path) if disk_path else None
+        self.metrics = {"hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+
+    def _count(self, result: str, namespace: str):
+        """Counts a lookup in the cache's own stats and in the /metrics counter."""
+        self.metrics[result] += 1
+        SEARCH_CACHE.inc(backend=namespace, result=_RESULT_LABELS[result])
+
+    def _ttl_for(self, normalized: str) -> float:
+        return self.live_ttl if _LIVE_WORDS.search(normalized) else self.ttl
+
+    def _remember(self, key: str, answer: str, expires: float):
+        self._entries[key] = (answer, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_search(self, query: str, search, namespace: str = "default") -> str:
+        """Returns a cached answer for the query, or awaits `search(query)` (once per key) and caches it."""
+        normalized = normalize_query(query)
+        key = f"{namespace}:{normalized}"
+        now = time.time()
+
+        cached = self._entries.get(key)
+        if cached is not None and cached[1] > now:
+            self._entries.move_to_end(key)
+            self._count("hits", namespace)
+            print(f"🗄️ Search cache hit for '{normalized}' ({cached[1] - now:.0f}s left)")
+            return cached[0]
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self._count("coalesced", namespace)
+            print(f"🗄️ Joining the in-flight search for '{normalized}'")
+        else:
+            task = asyncio.ensure_future(self._fetch(key, normalized, query, search, namespace))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Shielded, so one caller giving up doesn't cancel the search for the others.
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: str, normalized: str, query: str, search, namespace: str) -> str:
+        if self._disk is not None:
+            row = await run_blocking(self._disk.get, key)
+            if row is not None:
+                self._count("disk_hits", namespace)
+                self._remember(key, row[0], row[1])
+                return row[0]
+        self._count("misses", namespace)
+        try:
+            answer = await search(query)
+        except Exception:
+            self._count("errors", namespace)
+            raise
+        if _is_failure(answer):
+            self._count("errors", namespace)
+            return answer
+        expires = time.time() + self._ttl_for(normalized)
+        self._remember(key, answer, expires)
+        if self._disk is not None:
+            await run_blocking(self._disk.put, key, answer, expires)
+        return answer
+
+    def stats(self) -> dict:
+        lookups = sum(self.metrics[k] for k in ("hits", "disk_hits", "misses", "coalesced"))
+        served = lookups - self.metrics["misses"]
+        return {**self.metrics, "entries": len(self._entries),
+                "hit_rate": served / lookups if lookups else 0.0}
+
+
+# --- Shared Cache ---
+_cache = None
+
+def get_search_cache() -> SearchCache:
+    """Returns the process-wide search cache (with the disk store if SearchCacheDisk is on)."""
+    global _cache
+    if _cache is None:
+        _cache = SearchCache(disk_path=SEARCH_CACHE_PATH if SEARCH_CACHE_DISK else None)
+    return _cache
@@ -1,18 +1,60 @@
 import asyncio
+import json
 import subprocess
 from urllib.parse import quote_plus
+from utils.adb_session import run_shell, run_shell_batch
+from utils.executor import run_blocking
+
+ROUTINES_PATH = "Data/commands.json"
+_routines = None
+
 async def _execute_shell_command(command: str):
-    """Helper to run a single adb shell command."""
+    """Helper to run a single adb shell command over the persistent shell session; failures come back as an 'Error: ...' string."""
     full_command = f"adb shell {command}"
-    process = await asyncio.create_subprocess_shell(
-        full_command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    stdout, stderr = await process.communicate()
-    if process.returncode != 0:
-        print(f"⚠️ Error executing '{full_command}': {stderr.decode().strip()}")
-        return None
+    result = await run_shell(command)
+    if not result.ok:
+        reason = result.stderr.strip() if result.stderr else f"exit code {result.exit_code}"
+        print(f"⚠️ Error executing '{full_command}': {reason}")
+        return f"Error: '{full_command}' failed ({reason})."
     else:
-        print(f"✅ Successfully executed: '{full_command}'")
-        return stdout.decode().strip() if stdout else ""
+        print(f"✅ Successfully executed: '{full_command}' ({result.duration * 1000:.0f} ms)")
+        return result.stdout
+
+async def _execute_shell_batch(commands: list[str]) -> list[str | None]:
+    """Runs independent commands in a single adb round trip; returns each stdout, or None where it failed."""
+    results = await run_shell_batch(commands)
+    outputs = []
+    for result in results:
+        if result.ok:
+            outputs.append(result.stdout)
+        else:
+            print(f"⚠️ Error executing 'adb shell {result.command}': {result.stderr or f'exit code {result.exit_code}'}")
+            outputs.append(None)
+    succeeded = sum(r.ok for r in results)
+    total_ms = sum(r.duration for r in results) * 1000
+    print(f"{'✅' if succeeded == len(results) else '⚠️'} Executed {succeeded}/{len(results)} batched commands "
+          f"in one round trip ({total_ms:.0f} ms)")
+    return outputs
+
+def _load_routines() -> dict:
+    with open(ROUTINES_PATH, "r") as f:
+        return json.load(f).get("routines", {})
+
+async def _run_routine(name: str) -> str:
+    """Runs a routine from Data/commands.json; its steps are independent, so they go as one batch."""
+    global _routines
+    if _routines is None:
+        _routines = await run_blocking(_load_routines)
+    steps = _routines.get(name)
+    if not steps:
+        return f"Error: routine '{name}' is not defined in {ROUTINES_PATH}."
+    if any(not step.startswith("adb shell ") for step in steps):
+        return f"Error: routine '{name}' has steps that don't run in the device shell."
+    outputs = await _execute_shell_batch([step[len("adb shell "):] for step in steps])
+    failed = [step for step, output in zip(steps, outputs) if output is None]
+    if failed:
+        return f"Error: {len(failed)} of {len(steps)} steps in '{name}' failed: {'; '.join(failed)}"
+    return f"Routine '{name}' completed ({len(steps)} steps)."
 
 async def take_screenshot(**kwargs):
     return await _execute_shell_command("screencap -p /sdcard/Pictures/screenshot_$(date +%s).png")
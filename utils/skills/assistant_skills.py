@@ -1,46 +1,58 @@
 import asyncio
-import json
-import os
+import threading
 import time
-import subprocess
-import cv2
-import easyocr
-from utils.skills.adb_skills import _execute_shell_command
+from brain.memory_store import get_memory_store
+from utils.adb_session import device_lock
+from utils.app_index import get_app_index
+from utils.executor import run_blocking
+from utils.ocr_engine import IncrementalOCR
+from utils.screen_capture import ScreenFrame, capture_screen
+from utils.skills.adb_skills import _execute_shell_command, _run_routine
 
 # --- OCR Setup ---
-print("OCR: Initializing EasyOCR reader... (This may take a moment on first run)")
-reader = easyocr.Reader(['en'])
-print("OCR: Reader initialized.")
+# EasyOCR pulls in torch and the model weights, so the reader is only built on first use.
+reader = None
+ocr_engine = None
+_ocr_lock = threading.Lock()
 
-# --- App Dictionary ---
-try:
-    with open("Data/app_packages.json", "r") as f:
-        APP_DICTIONARY = json.load(f)
-except Exception:
-    APP_DICTIONARY = {}
+def _get_ocr_engine() -> IncrementalOCR:
+    global reader, ocr_engine
+    with _ocr_lock:
+        if ocr_engine is None:
+            import easyocr
+            print("OCR: Initializing EasyOCR reader... (This may take a moment on first run)")
+            reader = easyocr.Reader(['en'])
+            print("OCR: Reader initialized.")
+            # Polls re-OCR only the screen bands that changed since the last frame.
+            ocr_engine = IncrementalOCR(lambda image: reader.readtext(image, detail=0, paragraph=True))
+    return ocr_engine
+
+def warm_up():
+    """Builds the OCR reader ahead of the first wait_for_text call."""
+    _get_ocr_engine()
 
 # --- Skill Implementations ---
 async def open_app(**kwargs):
     app_name = kwargs.get("app_name")
     if not app_name: return "Error: app_name argument missing."
-    app_key = app_name.lower().strip().replace(" ", "")
-    if app_key in APP_DICTIONARY:
-        package_name = APP_DICTIONARY[app_key]
-        return await _execute_shell_command(f"monkey -p {package_name} -c android.intent.category.LAUNCHER 1")
+    # Fuzzy lookup against launcher labels and aliases, so near-misses don't cost an extra LLM round.
+    index = get_app_index()
+    match = index.resolve(app_name)
+    if match:
+        print(f"📱 '{app_name}' -> {match.label} ({match.package}, score {match.score})")
+        return await _execute_shell_command(f"monkey -p {match.package} -c android.intent.category.LAUNCHER 1")
     else:
-        print(f"⚠️ App '{app_name}' not found in dictionary.")
-        return f"App '{app_name}' not found"
+        print(f"⚠️ App '{app_name}' not found in the app index.")
+        suggestions = ", ".join(m.label for m in index.search(app_name))
+        return f"App '{app_name}' not found" + (f". Closest installed apps: {suggestions}" if suggestions else "")
 
 async def save_fact_to_memory(**kwargs):
     fact = kwargs.get("fact")
     if not fact: return "Error: fact argument missing."
     print(f"🧠 Remembering fact: '{fact}'")
     try:
-        try:
-            with open("Data/long_term_memory.json", "r") as f: memory = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError): memory = {"facts": []}
-        if fact not in memory["facts"]: memory["facts"].append(fact)
-        with open("Data/long_term_memory.json", "w") as f: json.dump(memory, f, indent=4)
+        # Hash-deduplicated insert into the indexed store; no full-file rewrite.
+        await run_blocking(get_memory_store().add_fact, fact)
         return "Fact saved successfully."
     except Exception as e:
         print(f"⚠️ Failed to save fact to memory: {e}")
@@ -52,20 +64,11 @@ async def wait(**kwargs):
     print(f"⏳ Waiting for {seconds} seconds...")
     await asyncio.sleep(float(seconds))
 
-def _is_text_visible(text_to_find: str) -> bool:
-    subprocess.run("adb shell screencap -p /sdcard/screen.png", shell=True)
-    subprocess.run("adb pull /sdcard/screen.png .", shell=True)
-    try:
-        img = cv2.imread("screen.png")
-        if img is None: return False
-        results = reader.readtext(img, detail=0, paragraph=True)
-        for line in results:
-            if text_to_find.lower() in line.lower():
-                print(f"✅ Found text: '{text_to_find}'")
-                return True
-        return False
-    finally:
-        if os.path.exists("screen.png"): os.remove("screen.png")
+def _is_text_visible(frame: ScreenFrame, text_to_find: str) -> bool:
+    if _get_ocr_engine().find_text(frame.as_array(), text_to_find):
+        print(f"✅ Found text: '{text_to_find}'")
+        return True
+    return False
 
 async def wait_for_text(**kwargs):
     text_to_find = kwargs.get("text_to_find")
@@ -73,18 +76,21 @@ async def wait_for_text(**kwargs):
     print(f"👀 Waiting for text: '{text_to_find}'...")
     max_wait_time = 15; start_time = time.time()
     while time.time() - start_time < max_wait_time:
-        if await asyncio.to_thread(_is_text_visible, text_to_find):
-            return "Text found."
+        try:
+            # Only the capture needs the device; OCR and the poll interval leave it free.
+            async with device_lock():
+                frame = await capture_screen()
+        except RuntimeError as e:
+            print(f"⚠️ Screen capture failed: {e}")
+        else:
+            if await run_blocking(_is_text_visible, frame, text_to_find):
+                return "Text found."
         await asyncio.sleep(1)
     print(f"⚠️ Timed out waiting for text: '{text_to_find}'")
     return "Text not found."
     
 async def class_mode_on(**kwargs):
-    await _execute_shell_command("cmd audio set_ringer_mode 1")
-    await _execute_shell_command("media volume --stream 3 --set 0")
-    await _execute_shell_command("media volume --stream 1 --set 0")
+    return await _run_routine("class_mode_on")
 
 async def class_mode_off(**kwargs):
-    await _execute_shell_command("cmd audio set_ringer_mode 2")
-    await _execute_shell_command("media volume --stream 3 --set 7")
-    await _execute_shell_command("media volume --stream 1 --set 4")
+    return await _run_routine("class_mode_off")
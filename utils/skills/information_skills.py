@@ -1,24 +1,22 @@
-import asyncio
-import os
-import subprocess
-import requests
-import base64
-import io
-from bs4 import BeautifulSoup
+import time
 from dotenv import dotenv_values
-from PIL import Image
+from brain.orchestrator import client # Reuse the Groq client for vision too
+from utils.adb_session import device_lock
+from utils.executor import run_blocking
+from utils.search_cache import get_search_cache
+from utils.screen_capture import capture_screen
+from utils.vision_prep import ScreenAnswerCache, prepare_image, screen_digest
+from utils.web_searcher import cached_web_search
 from utils.skills.adb_skills import _execute_shell_command
-from groq import AsyncGroq
 from serpapi import GoogleSearch
 # --- Configuration ---
 config = dotenv_values(".env")
-# Initialize the SambaNova client, which will be used for vision
-client = AsyncGroq(
-    api_key=config.get("GroqAPIKey"),
-)
-SCREENSHOT_PATH = "screen_for_vision.png"
 
 SERPAPI_KEY = config.get("SerpApiKey")
+# Point SerpApi at another host (e.g. a local stub server for tests and benchmarks).
+SERPAPI_URL = config.get("SerpApiURL")
+if SERPAPI_URL:
+    GoogleSearch.BACKEND = SERPAPI_URL.rstrip("/")
 
 # --- Web Search Skill ---
 def _silent_web_search(query: str) -> str:
@@ -48,35 +46,56 @@ def _silent_web_search(query: str) -> str:
         print(f"❌ Web search failed: {e}")
         return "Sorry sir, I had trouble connecting to the search API."
 
+async def web_search(query: str) -> str:
+    """
+    Cached web search: repeated and concurrent identical queries cost one call.
+    Uses SerpApi when a SerpApiKey is configured, otherwise the DuckDuckGo scraper.
+    """
+    if not SERPAPI_KEY:
+        return await cached_web_search(query)
+    return await get_search_cache().get_or_search(
+        query, lambda q: run_blocking(_silent_web_search, q), namespace="serpapi")
+
 async def silent_web_search(**kwargs):
     query = kwargs.get("query")
     if not query: return "Error: query argument missing."
-    return await asyncio.to_thread(_silent_web_search, query)
-
+    return await web_search(query)
 
-# --- NEW: Helper function to encode image for the API ---
-def _encode_image_to_base64(image: Image.Image) -> str:
-    """Converts a PIL Image to a base64 encoded string."""
-    buffered = io.BytesIO()
-    image.save(buffered, format="PNG")
-    return base64.b64encode(buffered.getvalue()).decode('utf-8')
 
 # --- Visual Analysis Skill (Upgraded) ---
+# Asking again about an unchanged screen is answered from here without a model call.
+screen_answers = ScreenAnswerCache()
+
+def _prepare_frame(frame, region: str) -> tuple[str, int]:
+    # Decoding (a full PNG decode with ScreenCaptureFormat=png) happens here, off the event loop.
+    return prepare_image(frame.as_image(), region)
+
 async def analyze_screen(**kwargs):
     question = kwargs.get("question")
     if not question: return "Error: question argument missing."
-    print(f"👀 Analyzing screen with question: '{question}'")
+    region = kwargs.get("region") or "full"
+    print(f"👀 Analyzing screen with question: '{question}' (region: {region})")
     try:
-        # 1. Capture the screen (no changes here)
-        subprocess.run(f"adb shell screencap -p /sdcard/{SCREENSHOT_PATH}", shell=True, check=True)
-        subprocess.run(f"adb pull /sdcard/{SCREENSHOT_PATH} .", shell=True, check=True)
+        # 1. Stream the screen straight into memory; the device is only held for the capture
+        async with device_lock():
+            frame = await capture_screen()
+
+        # 2. Skip the model if this exact question was just answered for this screen
+        digest = await run_blocking(screen_digest, frame.data)
+        cached = screen_answers.get(digest, question, region)
+        if cached is not None:
+            print(f"👁️ Screen unchanged, answering from cache: '{cached}'")
+            return cached
 
-        # 2. Open and encode the image for the API
-        img = Image.open(SCREENSHOT_PATH)
-        base64_image = _encode_image_to_base64(img)
-        img.close() # Release file lock immediately
+        # 3. Decode, crop, downscale and compress it on a worker thread. Pillow releases the GIL
+        # while decoding, resampling and encoding, and a thread reads the captured buffer in place
+        # instead of pickling the full-size image over to a worker process.
+        start = time.perf_counter()
+        image_url, size = await run_blocking(_prepare_frame, frame, region)
+        print(f"🖼️ Prepared {frame.width}x{frame.height} screen as {size / 1024:.0f} KiB "
+              f"in {(time.perf_counter() - start) * 1000:.0f} ms")
 
-        # 3. Call the SambaNova API with the image and question
+        # 4. Call the vision model with the image and question
         response = await client.chat.completions.create(
             model="meta-llama/llama-4-maverick-17b-128e-instruct",
             messages=[
@@ -87,7 +106,7 @@ async def analyze_screen(**kwargs):
                         {
                             "type": "image_url",
                             "image_url": {
-                                "url": f"data:image/png;base64,{base64_image}"
+                                "url": image_url
                             }
                         }
                     ]
@@ -97,16 +116,13 @@ async def analyze_screen(**kwargs):
         )
         
         answer = response.choices[0].message.content.strip()
-        print(f"👁️ SambaNova Vision answered: '{answer}'")
+        print(f"👁️ Vision model answered: '{answer}'")
+        screen_answers.put(digest, question, region, answer)
         return answer
         
     except Exception as e:
         print(f"❌ An error occurred during visual analysis: {e}")
         return f"Sorry sir, I encountered an error analyzing the screen: {e}"
-    finally:
-        # 4. Clean up the screenshot file (no changes here)
-        if os.path.exists(SCREENSHOT_PATH):
-            os.remove(SCREENSHOT_PATH)
 
 # --- Device Info Skills ---
 async def battery_stats(**kwargs):
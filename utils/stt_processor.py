@@ -1,27 +1,190 @@
-import speech_recognition as sr
+import abc
+import io
 import os
+import json
+import wave
+import importlib
+import threading
+import numpy as np
+from dotenv import dotenv_values
 
-def transcribe_audio(file_path: str) -> str | None:
+# --- Configuration ---
+config = dotenv_values(".env")
+# "google" (cloud, the original recognizer) or "vosk" (offline, CPU-only). A custom backend
+# can be given as "package.module:ClassName".
+STT_BACKEND = config.get("STTBackend", "google")
+VOSK_MODEL_PATH = config.get("VoskModelPath", "Data/vosk-model-small-en-us-0.15")
+
+
+# --- Backend Interface ---
+class STTBackend(abc.ABC):
     """
-    Transcribes the given audio file using Google's free STT API.
+    A speech-to-text engine. Backends take raw 16-bit mono PCM (bytes or an
+    int16 NumPy array) plus its sample rate; they never touch the filesystem.
+    Heavy state (models) is loaded once in __init__ and stays resident.
     """
-    if not os.path.exists(file_path):
+    name = "base"
+
+    @abc.abstractmethod
+    def transcribe(self, pcm: bytes, sample_rate: int) -> str | None:
+        """Returns the transcript of the whole clip, or None if nothing was understood."""
+
+    def open_stream(self, sample_rate: int) -> "STTStream":
+        """Returns an incremental recognizer. Backends without partials just buffer until finish()."""
+        return STTStream(self, sample_rate)
+
+
+class STTStream:
+    """Incremental transcription: feed PCM chunks as they are recorded, then finish()."""
+
+    def __init__(self, backend: STTBackend, sample_rate: int):
+        self.backend = backend
+        self.sample_rate = sample_rate
+        self._chunks = []
+
+    def feed(self, pcm) -> str | None:
+        """Adds audio; returns the current partial transcript if the backend supports one."""
+        self._chunks.append(_as_pcm_bytes(pcm))
+        return None
+
+    def finish(self) -> str | None:
+        return self.backend.transcribe(b"".join(self._chunks), self.sample_rate)
+
+
+class GoogleSTTBackend(STTBackend):
+    """Google's free web STT API via speech_recognition (needs network access)."""
+    name = "google"
+
+    def __init__(self):
+        import speech_recognition as sr
+        self._sr = sr
+        self._recognizer = sr.Recognizer()
+
+    def transcribe(self, pcm, sample_rate):
+        sr = self._sr
+        try:
+            print("🎙️ Transcribing audio...")
+            return self._recognizer.recognize_google(sr.AudioData(_as_pcm_bytes(pcm), sample_rate, 2))
+        except sr.UnknownValueError:
+            print("⚠️ Google STT could not understand the audio.")
+            return None
+        except sr.RequestError as e:
+            print(f"⚠️ Could not request results from Google STT; {e}")
+            return None
+
+
+class VoskSTTBackend(STTBackend):
+    """Offline, CPU-only recognition with Vosk. The model is loaded once and kept in memory."""
+    name = "vosk"
+
+    def __init__(self, model_path: str = VOSK_MODEL_PATH):
+        import vosk
+        vosk.SetLogLevel(-1)
+        if not os.path.isdir(model_path):
+            raise FileNotFoundError(
+                f"Vosk model not found at '{model_path}'. Download one from https://alphacephei.com/vosk/models "
+                "and set VoskModelPath in .env.")
+        print(f"🎙️ Loading offline STT model from '{model_path}'...")
+        self._vosk = vosk
+        self._model = vosk.Model(model_path)
+
+    def transcribe(self, pcm, sample_rate):
+        stream = self.open_stream(sample_rate)
+        stream.feed(pcm)
+        return stream.finish()
+
+    def open_stream(self, sample_rate):
+        return _VoskStream(self, sample_rate, self._vosk.KaldiRecognizer(self._model, sample_rate))
+
+
+class _VoskStream(STTStream):
+    def __init__(self, backend: VoskSTTBackend, sample_rate: int, recognizer):
+        super().__init__(backend, sample_rate)
+        self._recognizer = recognizer
+        self._final_parts = []
+
+    def feed(self, pcm):
+        if self._recognizer.AcceptWaveform(_as_pcm_bytes(pcm)):
+            self._final_parts.append(json.loads(self._recognizer.Result()).get("text", ""))
+            return " ".join(p for p in self._final_parts if p)
+        partial = json.loads(self._recognizer.PartialResult()).get("partial", "")
+        return " ".join(p for p in self._final_parts + [partial] if p)
+
+    def finish(self):
+        self._final_parts.append(json.loads(self._recognizer.FinalResult()).get("text", ""))
+        text = " ".join(p for p in self._final_parts if p).strip()
+        if not text:
+            print("⚠️ Offline STT could not understand the audio.")
+        return text or None
+
+
+_BACKENDS = {"google": GoogleSTTBackend, "vosk": VoskSTTBackend}
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend() -> STTBackend:
+    """Returns the configured backend, creating it (and loading its model) on first use."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if ":" in STT_BACKEND:
+                module_name, class_name = STT_BACKEND.split(":", 1)
+                backend_class = getattr(importlib.import_module(module_name), class_name)
+            else:
+                backend_class = _BACKENDS[STT_BACKEND.lower()]
+            _backend = backend_class()
+    return _backend
+
+
+# --- PCM Helpers ---
+def _as_pcm_bytes(pcm) -> bytes:
+    if isinstance(pcm, np.ndarray):
+        return np.ascontiguousarray(pcm, dtype=np.int16).tobytes()
+    return bytes(pcm)
+
+def wav_to_pcm(wav_bytes: bytes) -> tuple[np.ndarray, int]:
+    """Decodes an in-memory 16-bit WAV file into mono int16 PCM and its sample rate."""
+    with wave.open(io.BytesIO(wav_bytes), "rb") as wf:
+        channels, sample_width, sample_rate = wf.getnchannels(), wf.getsampwidth(), wf.getframerate()
+        frames = wf.readframes(wf.getnframes())
+    if sample_width != 2:
+        raise ValueError(f"Only 16-bit PCM WAV audio is supported (got {8 * sample_width}-bit).")
+    pcm = np.frombuffer(frames, dtype=np.int16)
+    if channels > 1:
+        pcm = pcm.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return pcm, sample_rate
+
+
+# --- Public API ---
+def transcribe_pcm(pcm, sample_rate: int) -> str | None:
+    """Transcribes raw 16-bit mono PCM (bytes or int16 array) with the configured backend."""
+    if pcm is None or len(pcm) == 0:
+        return None
+    return get_backend().transcribe(pcm, sample_rate)
+
+def transcribe_audio_bytes(wav_bytes: bytes) -> str | None:
+    """
+    Transcribes WAV data held in memory. Nothing is written to disk, so
+    concurrent requests can never read each other's audio.
+    """
+    if not wav_bytes:
         return None
-        
-    r = sr.Recognizer()
     try:
-        with sr.AudioFile(file_path) as source:
-            audio_data = r.record(source)
-        
-        print("🎙️ Transcribing audio...")
-        text = r.recognize_google(audio_data)
-        return text
-    except sr.UnknownValueError:
-        print("⚠️ Google STT could not understand the audio.")
+        pcm, sample_rate = wav_to_pcm(wav_bytes)
+    except (wave.Error, EOFError, ValueError) as e:
+        print(f"⚠️ Could not read the audio data; {e}")
         return None
-    except sr.RequestError as e:
-        print(f"⚠️ Could not request results from Google STT; {e}")
+    return transcribe_pcm(pcm, sample_rate)
+
+def transcribe_audio(file_path: str) -> str | None:
+    """
+    Transcribes the given WAV file with the configured backend.
+    """
+    if not os.path.exists(file_path):
         return None
+    try:
+        with open(file_path, "rb") as f:
+            return transcribe_audio_bytes(f.read())
     finally:
         # Clean up the audio file
         if os.path.exists(file_path):
@@ -0,0 +1,239 @@
+import bisect
+import contextlib
+import contextvars
+import itertools
+import json
+import os
+import secrets
+import threading
+import time
+from dotenv import dotenv_values
+
+# --- Configuration ---
+config = dotenv_values(".env")
+# When set, every /api/jarvis request writes its trace as JSON into this folder.
+TRACE_DIR = config.get("TraceDir")
+# Seconds. Spans from ~1 ms ADB commands to multi-second LLM rounds.
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+# --- Metrics ---
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _label_text(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+class Counter:
+    """A monotonically increasing count per label set."""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_text(key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """Cumulative latency buckets, a sum and a count per label set."""
+
+    def __init__(self, name: str, help_text: str, buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_label_text(key + (('le', f'{bound:g}'),))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_label_text(key + (('le', '+Inf'),))} {series[-1]}")
+                lines.append(f"{self.name}_sum{_label_text(key)} {series[-2]:.6f}")
+                lines.append(f"{self.name}_count{_label_text(key)} {series[-1]}")
+        return lines
+
+
+STAGE_SECONDS = Histogram("jarvis_stage_seconds", "Time spent per pipeline stage (upload, stt, llm, tool, tts).")
+TOOL_SECONDS = Histogram("jarvis_tool_seconds", "Tool call latency by skill.")
+ADB_RTT_SECONDS = Histogram("jarvis_adb_rtt_seconds", "Round-trip time of completed commands on the persistent adb shell.")
+REQUESTS = Counter("jarvis_requests_total", "Requests handled, by endpoint and how they were answered.")
+TOOL_CALLS = Counter("jarvis_tool_calls_total", "Tool calls by skill and outcome.")
+LLM_TOKENS = Counter("jarvis_llm_tokens_total", "LLM tokens by kind (prompt, cached_prompt, completion).")
+STAGE_ERRORS = Counter("jarvis_stage_errors_total", "Stages that raised, by stage.")
+SEARCH_CACHE = Counter("jarvis_search_cache_total", "Web search lookups by backend and result (hit, disk_hit, miss, coalesced, error).")
+_METRICS = [REQUESTS, STAGE_SECONDS, STAGE_ERRORS, TOOL_CALLS, TOOL_SECONDS, ADB_RTT_SECONDS, LLM_TOKENS, SEARCH_CACHE]
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    return "\n".join(line for metric in _METRICS for line in metric.render()) + "\n"
+
+
+# --- Spans ---
+_current_trace = contextvars.ContextVar("jarvis_trace", default=None)
+_current_span = contextvars.ContextVar("jarvis_span", default=None)
+_span_ids = itertools.count(1)
+
+
+class Span:
+    """One timed stage. Attributes carry stage details such as token counts or ADB round trips."""
+
+    def __init__(self, name: str, parent: "Span | None", attrs: dict, start: float | None = None):
+        self.id = next(_span_ids)
+        self.name = name
+        self.parent_id = parent.id if parent else None
+        self.attrs = attrs
+        self.error = None
+        self.start = start or time.perf_counter()
+        self.end = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.perf_counter()) - self.start
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def add(self, key: str, amount: float):
+        self.attrs[key] = self.attrs.get(key, 0) + amount
+
+    def to_dict(self, origin: float) -> dict:
+        return {"id": self.id, "parent": self.parent_id, "name": self.name,
+                "start_ms": round((self.start - origin) * 1000, 2),
+                "duration_ms": round(self.duration * 1000, 2),
+                "attrs": self.attrs, **({"error": self.error} if self.error else {})}
+
+
+class Trace:
+    """All spans of one request, in the order they finished."""
+
+    def __init__(self, name: str, start: float | None = None):
+        self.id = secrets.token_hex(8)
+        self.name = name
+        self.start = start or time.perf_counter()
+        self.started_at = time.time() - (time.perf_counter() - self.start)
+        self.root = None
+        self.spans = []
+
+    def to_dict(self) -> dict:
+        return {"trace_id": self.id, "name": self.name, "started_at": self.started_at,
+                "duration_ms": round((time.perf_counter() - self.start) * 1000, 2),
+                "spans": [s.to_dict(self.start) for s in self.spans]}
+
+    def dump(self, directory: str = TRACE_DIR) -> str:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{self.id}.json")
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+        return path
+
+
+def _reset(var: contextvars.ContextVar, token):
+    try:
+        var.reset(token)
+    except ValueError:
+        # An abandoned async generator (e.g. a closed SSE stream) is finalized in another context.
+        pass
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+@contextlib.contextmanager
+def span(name: str, started: float | None = None, **attrs):
+    """
+    Times a stage and records it into the request's trace (if any) and the
+    stage histogram. Works the same in sync and async code; spans opened in
+    tasks created inside it are nested under it. `started` backdates the span
+    to an earlier perf_counter() reading.
+    """
+    current = Span(name, _current_span.get(), attrs, started)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = type(e).__name__
+        raise
+    finally:
+        current.end = time.perf_counter()
+        _reset(_current_span, token)
+        _record(current)
+
+def record_span(name: str, start: float, end: float, **attrs):
+    """Records a stage that was timed before its trace existed (e.g. the upload)."""
+    finished = Span(name, _current_span.get(), attrs, start)
+    finished.end = end
+    _record(finished)
+
+def _record(finished: Span):
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.spans.append(finished)
+    STAGE_SECONDS.observe(finished.duration, stage=finished.name)
+    if finished.error:
+        STAGE_ERRORS.inc(stage=finished.name)
+    if finished.name == "tool":
+        skill = finished.attrs.get("skill", "unknown")
+        TOOL_SECONDS.observe(finished.duration, skill=skill)
+        TOOL_CALLS.inc(skill=skill, outcome=finished.attrs.get("outcome", "error" if finished.error else "ok"))
+
+@contextlib.contextmanager
+def trace_request(endpoint: str, started: float | None = None):
+    """
+    Starts a trace for one request; everything awaited inside records its spans
+    into it. Set `trace.root.attrs["route"]` to say how the request was answered.
+    """
+    trace = Trace(endpoint, started)
+    trace_token = _current_trace.set(trace)
+    try:
+        with span("request", started=trace.start, endpoint=endpoint) as root:
+            trace.root = root
+            yield trace
+    finally:
+        _reset(_current_trace, trace_token)
+        REQUESTS.inc(endpoint=endpoint, route=root.attrs.get("route", "error"))
+
+
+# --- Stage Helpers ---
+def record_tokens(prompt: int, cached: int, completion: int):
+    """Adds an LLM round's token counts to the current span and the token counters."""
+    LLM_TOKENS.inc(prompt, kind="prompt")
+    LLM_TOKENS.inc(cached, kind="cached_prompt")
+    LLM_TOKENS.inc(completion, kind="completion")
+    if (active := _current_span.get()) is not None:
+        active.set(prompt_tokens=prompt, cached_prompt_tokens=cached, completion_tokens=completion)
+
+def record_adb_command(duration: float):
+    """Counts an adb round trip against the current span (usually a tool call)."""
+    ADB_RTT_SECONDS.observe(duration)
+    if (active := _current_span.get()) is not None:
+        active.add("adb_commands", 1)
+        active.add("adb_ms", round(duration * 1000, 2))
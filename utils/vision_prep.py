@@ -0,0 +1,99 @@
+import base64
+import hashlib
+import io
+import re
+import time
+from collections import OrderedDict
+from dotenv import dotenv_values
+from PIL import Image
+
+# --- Configuration ---
+config = dotenv_values(".env")
+# Longest side sent to the vision model. Larger images are downscaled by the API anyway,
+# they only cost upload time.
+VISION_MAX_SIDE = int(config.get("VisionMaxSide", 1280))
+# "jpeg", "webp" or "png" (lossless, the old behaviour).
+VISION_FORMAT = config.get("VisionFormat", "jpeg").lower()
+# High enough that small UI text survives the compression.
+VISION_QUALITY = int(config.get("VisionQuality", 85))
+VISION_CACHE_TTL = float(config.get("VisionCacheTTL", 120))
+
+# Fractions of the screen height: (top, bottom).
+REGIONS = {
+    "full": (0.0, 1.0),
+    "top": (0.0, 0.4),
+    "middle": (0.3, 0.7),
+    "bottom": (0.6, 1.0),
+}
+_MIME = {"jpeg": "image/jpeg", "webp": "image/webp", "png": "image/png"}
+
+
+# --- Image Preparation ---
+def prepare_image(image: Image.Image, region: str = "full", max_side: int = VISION_MAX_SIDE,
+                  fmt: str = VISION_FORMAT, quality: int = VISION_QUALITY) -> tuple[str, int]:
+    """
+    Crops to the requested region, downscales to `max_side` and encodes the
+    screenshot. Returns a data URL for the vision API and its size in bytes.
+    """
+    top, bottom = REGIONS.get(region, REGIONS["full"])
+    if (top, bottom) != (0.0, 1.0):
+        image = image.crop((0, int(image.height * top), image.width, int(image.height * bottom)))
+    scale = max_side / max(image.size)
+    if scale < 1:
+        image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+                             Image.LANCZOS)
+    if fmt not in _MIME:
+        fmt = "jpeg"
+    if image.mode not in ("RGB", "RGBA") or (fmt == "jpeg" and image.mode != "RGB"):
+        image = image.convert("RGB")
+    buffered = io.BytesIO()
+    if fmt == "png":
+        image.save(buffered, format="PNG")
+    else:
+        image.save(buffered, format=fmt.upper(), quality=quality)
+    data = buffered.getvalue()
+    return f"data:{_MIME[fmt]};base64,{base64.b64encode(data).decode('utf-8')}", len(data)
+
+
+# --- Screen Answer Cache ---
+def screen_digest(data: bytes) -> bytes:
+    """Exact digest of a captured frame's bytes; any changed pixel gives a new key."""
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+def _normalize_question(question: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", " ", question.lower()).split())
+
+
+class ScreenAnswerCache:
+    """
+    Remembers recent (screen, question) -> answer pairs, keyed on the exact
+    screen digest, so re-asking about an unchanged screen never reaches the
+    model and a screen that changed at all (even a toast or a digit) always does.
+    """
+
+    def __init__(self, ttl: float = VISION_CACHE_TTL, max_entries: int = 32):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (question, region, digest) -> (answer, expires_at)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, digest: bytes, question: str, region: str) -> str | None:
+        key = (_normalize_question(question), region, digest)
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] <= time.time():
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, digest: bytes, question: str, region: str, answer: str):
+        key = (_normalize_question(question), region, digest)
+        self._entries[key] = (answer, time.time() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -1,37 +1,118 @@
+import asyncio
 import requests
+import httpx
+from html.parser import HTMLParser
 from bs4 import BeautifulSoup
+from dotenv import dotenv_values
+from utils.search_cache import get_search_cache
+
+# --- Configuration ---
+config = dotenv_values(".env")
+# Overridable so the scraper can be pointed at a local stub server.
+SEARCH_URL = config.get("DuckDuckGoURL", "https://duckduckgo.com/html/")
+RESULT_LIMIT = 3
+# After the results are parsed, the rest of the page (DuckDuckGo's is ~50 KiB) is still read
+# up to this size so the connection can go back to the keep-alive pool.
+DRAIN_LIMIT = 256 * 1024
 
 # Using headers to pretend we are a real browser
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
 }
 
+# --- Result Parsing ---
+class ResultTitleParser(HTMLParser):
+    """
+    Collects the text of the first `limit` `a.result__a` anchors from a DuckDuckGo
+    results page. It is fed the page chunk by chunk and builds no tree, so the
+    caller can stop downloading and parsing as soon as `done` is True.
+    """
+
+    def __init__(self, limit: int = RESULT_LIMIT):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self.results = []
+        self._text = None  # Text pieces of the result anchor currently open, if any
+
+    @property
+    def done(self) -> bool:
+        return len(self.results) >= self.limit
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a" and self._text is None and not self.done:
+            classes = (dict(attrs).get("class") or "").split()
+            if "result__a" in classes:
+                self._text = []
+
+    def handle_data(self, data):
+        if self._text is not None:
+            self._text.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == "a" and self._text is not None:
+            title = " ".join("".join(self._text).split())
+            if title:
+                self.results.append(title)
+            self._text = None
+
+def parse_results(html_chunks, limit: int = RESULT_LIMIT) -> list[str]:
+    """Early-exit parse of an iterable of HTML text chunks."""
+    parser = ResultTitleParser(limit)
+    for chunk in html_chunks:
+        parser.feed(chunk)
+        if parser.done:
+            break
+    return parser.results
+
+def parse_results_soup(html: str, limit: int = RESULT_LIMIT) -> list[str]:
+    """The original full-tree BeautifulSoup parse; kept as the benchmark baseline."""
+    soup = BeautifulSoup(html, 'html.parser')
+    return [result.get_text(strip=True) for result in soup.find_all('a', class_='result__a')[:limit]]
+
+def _format_results(results: list[str]) -> str:
+    if not results:
+        return "Sorry sir, I couldn't find any direct results for that query."
+    return " ".join(f"{title}." for title in results)
+
+
+# --- Shared Connection Pools ---
+_session = requests.Session()
+_session.headers.update(HEADERS)
+_client = None
+_client_loop = None
+
+def _get_client() -> httpx.AsyncClient:
+    # One keep-alive pool per event loop; the connections belong to the loop that opened them.
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            headers=HEADERS, timeout=5.0, follow_redirects=True,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10))
+        _client_loop = loop
+    return _client
+
+async def close_http_client():
+    global _client
+    if _client is not None and _client_loop is asyncio.get_running_loop():
+        await _client.aclose()
+    _client = None
+
+
+# --- Search ---
 def silent_web_search(query: str) -> str:
     """
     Performs a web search and scrapes the first few results or a featured snippet.
+    Blocking variant; reuses one pooled requests session.
     """
     print(f"🤫 Performing silent web search for: '{query}'")
     try:
         # We'll use DuckDuckGo as it's generally easier to scrape than Google
-        search_url = f"https://duckduckgo.com/html/?q={query}"
-        
-        response = requests.get(search_url, headers=HEADERS, timeout=5)
-        response.raise_for_status() # Raise an exception for bad status codes
-
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Find all result snippets
-        results = soup.find_all('a', class_='result__a')
-        
-        if not results:
-            return "Sorry sir, I couldn't find any direct results for that query."
-
-        # Extract text from the top 3 results
-        snippet = ""
-        for i, result in enumerate(results[:3]):
-            snippet += result.get_text(strip=True) + ". "
-        
-        return snippet.strip()
+        with _session.get(SEARCH_URL, params={"q": query}, timeout=5, stream=True) as response:
+            response.raise_for_status() # Raise an exception for bad status codes
+            response.encoding = response.encoding or "utf-8"
+            results = parse_results(response.iter_content(chunk_size=16384, decode_unicode=True))
+        return _format_results(results)
 
     except requests.RequestException as e:
         print(f"❌ Web search failed: {e}")
@@ -39,3 +120,35 @@ def silent_web_search(query: str) -> str:
     except Exception as e:
         print(f"❌ An error occurred during web scraping: {e}")
         return "Sorry sir, I encountered an error while processing the search results."
+
+async def silent_web_search_async(query: str) -> str:
+    """
+    Async variant on a shared keep-alive pool. The page is streamed into the
+    early-exit parser, which stops parsing once enough results are found; the
+    remainder is only drained (up to DRAIN_LIMIT) so the connection is reused.
+    """
+    print(f"🤫 Performing silent web search for: '{query}'")
+    try:
+        parser = ResultTitleParser()
+        drained = 0
+        async with _get_client().stream("GET", SEARCH_URL, params={"q": query}) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_text():
+                if not parser.done:
+                    parser.feed(chunk)
+                    continue
+                drained += len(chunk)
+                if drained > DRAIN_LIMIT:
+                    break # Not worth reading; let httpx drop this connection.
+        return _format_results(parser.results)
+
+    except httpx.HTTPError as e:
+        print(f"❌ Web search failed: {e}")
+        return "Sorry sir, I'm having trouble connecting to the internet to perform the search."
+    except Exception as e:
+        print(f"❌ An error occurred during web scraping: {e}")
+        return "Sorry sir, I encountered an error while processing the search results."
+
+async def cached_web_search(query: str) -> str:
+    """The DuckDuckGo scraper behind the shared TTL cache, with concurrent identical queries coalesced."""
+    return await get_search_cache().get_or_search(query, silent_web_search_async, namespace="duckduckgo")